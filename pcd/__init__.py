@@ -18,13 +18,14 @@ You should have received a copy of the GNU Lesser General Public License along
 with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-__all__ = 'contract', 'Invariant'
+__all__ = 'contract', 'Invariant', 'trust', 'distrust'
 
 
 #------------------------------------------------------------------------------#
 if __debug__:
     from pcd._invariant import Invariant
     from pcd._contract  import contract
+    from pcd._trust     import trust, distrust
 else:
     class Invariant(type):
         def __new__(self, class_name, base_classes, attributes, *a, **k):
@@ -33,5 +34,13 @@ else:
                 self, class_name, base_classes, attributes)
     def contract(*args, **kwargs):
         def decorator(function):
+            def batched(iterable, *args, **kwargs):
+                return (function(*arguments) for arguments in iterable)
+            function.unchecked = function
+            function.map       = batched
             return function
         return decorator
+    def trust(*args, **kwargs):
+        pass
+    def distrust(*args, **kwargs):
+        pass
@@ -0,0 +1,211 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from types   import MemberDescriptorType
+from inspect import getmro
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+try:
+    from dis import get_instructions
+except ImportError:
+    from dis import opname, hasname, haslocal, hasconst, HAVE_ARGUMENT, \
+                    EXTENDED_ARG
+    get_instructions = None
+
+__all__ = 'resolver', 'reads', 'writes'
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Methods of the class which can change or get the attributes dynamically, if
+# any of them is defined, attribute accesses cannot be told from the bytecode
+_DYNAMIC  = '__setattr__', '__delattr__', '__getattr__', '__getattribute__'
+# Instructions which may change the objects referenced by the instance (even
+# via aliases), or the global and the closure variables read by the conditions
+_ESCAPES  = {'STORE_SUBSCR', 'DELETE_SUBSCR', 'STORE_SLICE', 'DELETE_SLICE',
+             'STORE_ATTR', 'DELETE_ATTR', 'STORE_GLOBAL', 'DELETE_GLOBAL',
+             'STORE_NAME', 'DELETE_NAME', 'STORE_DEREF', 'DELETE_DEREF',
+             'IMPORT_NAME', 'IMPORT_STAR', 'EXEC_STMT', 'YIELD_VALUE',
+             'YIELD_FROM', 'GET_AWAITABLE', 'SEND'}
+# Instructions loading a local variable
+_LOADS    = {'LOAD_FAST', 'LOAD_FAST_CHECK', 'LOAD_FAST_BORROW'}
+# Instructions loading a global or a closure variable
+_GLOBALS  = {'LOAD_GLOBAL', 'LOAD_NAME'}
+_CLOSURES = {'LOAD_DEREF', 'LOAD_CLASSDEREF', 'LOAD_CLOSURE',
+             'LOAD_FROM_DICT_OR_DEREF'}
+
+
+#------------------------------------------------------------------------------#
+if get_instructions is None:
+    def _instructions(code):
+        # Decode the bytecode of Python 2, which has no instruction API
+        co_code  = bytearray(code.co_code)
+        index    = 0
+        extended = 0
+        while index < len(co_code):
+            operation = co_code[index]
+            if operation < HAVE_ARGUMENT:
+                index += 1
+                yield opname[operation], None, ''
+                continue
+            argument = co_code[index + 1] | co_code[index + 2] << 8 | extended
+            index += 3
+            if operation == EXTENDED_ARG:
+                extended = argument << 16
+                continue
+            extended = 0
+            if operation in hasname:
+                argument = code.co_names[argument]
+            elif operation in haslocal:
+                argument = code.co_varnames[argument]
+            elif operation in hasconst:
+                argument = code.co_consts[argument]
+            yield opname[operation], argument, ''
+else:
+    def _instructions(code):
+        for instruction in get_instructions(code):
+            yield instruction.opname, instruction.argval, instruction.argrepr
+
+
+#------------------------------------------------------------------------------#
+def _names(argument):
+    # Names of the variables used by an instruction (some instructions of newer
+    # Pythons are using two variables at once)
+    if isinstance(argument, tuple):
+        return argument
+    return argument,
+
+
+#------------------------------------------------------------------------------#
+def _is_plain_attribute(instruction, is_plain):
+    # Attribute which is only read, and which is not a method being called
+    operation, argument, representation = instruction
+    return (operation == 'LOAD_ATTR'
+            and is_plain(argument)
+            and not representation.startswith('NULL'))
+
+
+#------------------------------------------------------------------------------#
+def resolver(attributes, base_classes):
+    # Return a function which tells if an attribute of the instances of the
+    # class is a plain value or not, or None if no attributes can be told
+    namespaces = [attributes]
+    for base_class in base_classes:
+        namespaces.extend(vars(class_) for class_ in getmro(base_class)
+                                       if class_ is not object)
+    for name in _DYNAMIC:
+        if any(name in namespace for namespace in namespaces):
+            return None
+
+    def is_plain(name):
+        # Methods, properties and other descriptors can run arbitrary code
+        if name == '__dict__':
+            return False
+        for namespace in namespaces:
+            try:
+                attribute = namespace[name]
+            except KeyError:
+                continue
+            return (isinstance(attribute, MemberDescriptorType)
+                    or not hasattr(type(attribute), '__get__'))
+        return True
+    return is_plain
+
+
+#------------------------------------------------------------------------------#
+def reads(condition, is_plain):
+    # Return the attributes of self read by the condition, or None if they
+    # cannot be told, or if the condition reads any other variables, which may
+    # be changed by the methods, apart from the builtins
+    try:
+        codes        = [condition.__code__]
+        cond_globals = condition.__globals__
+    except AttributeError:
+        return None
+    attributes = set()
+    while codes:
+        code = codes.pop()
+        if code.co_cellvars or code.co_freevars:
+            return None
+        codes.extend(constant for constant in code.co_consts
+                              if isinstance(constant, type(code)))
+        instructions = list(_instructions(code))
+        for index, (operation, argument, _) in enumerate(instructions):
+            if operation in _CLOSURES:
+                return None
+            elif operation not in _GLOBALS:
+                continue
+            elif argument != 'self':
+                if argument in cond_globals or not hasattr(builtins, argument):
+                    return None
+                continue
+            try:
+                instruction = instructions[index + 1]
+            except IndexError:
+                return None
+            if not _is_plain_attribute(instruction, is_plain):
+                return None
+            attributes.add(instruction[1])
+    # Conditions not reading self may depend on anything
+    return attributes or None
+
+
+#------------------------------------------------------------------------------#
+def writes(method, is_plain):
+    # Return the attributes of self which are changed by the method, or None if
+    # they cannot be told, that is, if the method may change anything else than
+    # the attributes of self, including the objects referenced by them
+    try:
+        code = method.__code__
+    except AttributeError:
+        return None
+    if (not code.co_argcount
+        or code.co_varnames[0] in code.co_cellvars
+        or '__class__' in code.co_freevars):
+            return None
+    self         = code.co_varnames[0]
+    written      = set()
+    instructions = list(_instructions(code)) + [(None, None, '')]
+    index        = 0
+    while index < len(instructions) - 1:
+        operation, argument, representation = instructions[index]
+        index += 1
+        names = _names(argument) if 'FAST' in operation else ()
+        if self not in names:
+            if (operation in _ESCAPES
+                or 'CALL' in operation
+                or operation.startswith('INPLACE_')
+                or operation == 'BINARY_OP' and '=' in representation):
+                    return None
+            continue
+        # Self can only be loaded, as the last variable of the instruction, and
+        # then its plain attributes can be set, deleted or read only
+        if (names.index(self) != len(names) - 1
+            or not any(operation.endswith(load) for load in _LOADS)):
+                return None
+        operation, argument, representation = instructions[index]
+        index += 1
+        if operation in ('STORE_ATTR', 'DELETE_ATTR') and is_plain(argument):
+            written.add(argument)
+        elif not (_is_plain_attribute(instructions[index - 1], is_plain)
+                  or operation == 'RETURN_VALUE'):
+            return None
+    return written
@@ -0,0 +1,378 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from sys             import _getframe
+from timeit          import default_timer
+from inspect         import iscoroutinefunction
+from collections     import OrderedDict
+try:
+    from asyncio import get_running_loop
+# Before Python 3.7 the event loop of the running coroutine is the one of the
+# current thread
+except ImportError:
+    from asyncio import get_event_loop as get_running_loop
+from pcd._trust      import _TRUSTED, _ALL, _trusted
+from pcd._contract   import (_Depth, _inject_invoke, _validate as _validate_now,
+                             isasyncgenfunction)
+from pcd._parallel   import _isolate
+from pcd._instrument import _INSTRUMENTS, _Measurement, _name, _rename
+
+__all__ = 'wrap',
+
+
+#------------------------------------------------------------------------------#
+async def _validate(conditions,
+                    new_globals,
+                    executor,
+                    takes_args = False,
+                    result     = None):
+    arguments = (result,) if takes_args else ()
+    for assumption, message in conditions.items():
+        # Await asynchronous conditions
+        if iscoroutinefunction(assumption):
+            isolated = _isolate(assumption, new_globals)
+            assert await isolated(*arguments), message
+        # Run synchronous conditions inline
+        elif executor is False:
+            _inject_invoke(assumption, new_globals, message, takes_args, result)
+        # Run synchronous conditions in an executor, so they are not blocking
+        # the event loop
+        else:
+            isolated = _isolate(assumption, new_globals)
+            assert await get_running_loop().run_in_executor(
+                executor, isolated, *arguments), message
+
+
+#------------------------------------------------------------------------------#
+async def _validate_measured(measurement, *args):
+    started = default_timer()
+    try:
+        await _validate(*args)
+    except AssertionError:
+        measurement.failed = True
+        raise
+    finally:
+        measurement.checking += default_timer() - started
+
+
+#------------------------------------------------------------------------------#
+def _split(conditions, executor):
+    # Separate the conditions which can be checked right away from the ones
+    # which have to be awaited, or which are run in an executor
+    now   = OrderedDict()
+    later = OrderedDict()
+    for assumption, message in conditions.items():
+        if executor is False and not iscoroutinefunction(assumption):
+            now[assumption] = message
+        else:
+            later[assumption] = message
+    return now, later
+
+
+#------------------------------------------------------------------------------#
+class _Stream(object):
+
+    # Validates the preconditions which have to be awaited when the first item
+    # is requested, and then the yielded items lazily, one at a time, and the
+    # mutated conditions when the asynchronous generator is exhausted
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, generator, conditions, new_globals, executor, sample,
+                       pre):
+        self._generator   = generator
+        self._conditions  = conditions
+        self._new_globals = new_globals
+        self._executor    = executor
+        self._sample      = sample
+        self._pre         = pre
+        self._count       = 0
+        self._exhausted   = False
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __aiter__(self):
+        return self
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def __anext__(self):
+        return await self._advance(self._generator.__anext__)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def asend(self, value):
+        return await self._advance(self._generator.asend, value)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def athrow(self, *args):
+        return await self._advance(self._generator.athrow, *args)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def aclose(self):
+        await self._generator.aclose()
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def _advance(self, method, *args):
+        # Validate the awaited preconditions before the body of the generator
+        # is started, as they cannot be awaited when the generator is created
+        if self._pre:
+            pre, self._pre = self._pre, None
+            await _validate(pre, self._new_globals, self._executor)
+        try:
+            item = await method(*args)
+        except StopAsyncIteration:
+            # Validate the conditions only the first time the generator is
+            # exhausted, asynchronous generators cannot return values, so the
+            # postconditions get None
+            if not self._exhausted:
+                self._exhausted = True
+                await _validate(self._conditions['post'],
+                                self._new_globals,
+                                self._executor,
+                                True,
+                                None)
+                await _validate(
+                    self._conditions['mut'], self._new_globals, self._executor)
+            raise
+
+        # Validate every n-th yielded item
+        if not self._count % self._sample:
+            await _validate(self._conditions['each'],
+                            self._new_globals,
+                            self._executor,
+                            True,
+                            item)
+        self._count += 1
+        return item
+
+
+#------------------------------------------------------------------------------#
+class _Leveled(object):
+
+    # Keeps the level of recursion of an asynchronous generator while it is
+    # advanced, as the body of the generator is running only then, and not when
+    # it is called
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, generator, depth, level):
+        self._generator = generator
+        self._depth     = depth
+        self._level     = level
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __aiter__(self):
+        return self
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def __anext__(self):
+        return await self._advance(self._generator.__anext__)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def asend(self, value):
+        return await self._advance(self._generator.asend, value)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def athrow(self, *args):
+        return await self._advance(self._generator.athrow, *args)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def aclose(self):
+        await self._advance(self._generator.aclose)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    async def _advance(self, method, *args):
+        token = self._depth.enter(self._level)
+        try:
+            return await method(*args)
+        finally:
+            self._depth.leave(token)
+
+
+#------------------------------------------------------------------------------#
+def _wrap_generator(function,
+                    conditions,
+                    bind,
+                    caller,
+                    recursion,
+                    executor,
+                    sample):
+    name = _name(function)
+
+    # Create new guarded asynchronous generator function, which validates the
+    # generator while it is being consumed
+    def checked(*args, **kwargs):
+        # If the caller is trusted, skip the conditions
+        trusted = _trusted(_getframe(caller)) if _TRUSTED else 0
+        if trusted == _ALL:
+            return function(*args, **kwargs)
+        # If there are instruments, measure the call
+        if _INSTRUMENTS:
+            return measured(trusted, args, kwargs)
+        new_globals = bind(args, kwargs)
+
+        # Validate the preconditions which are not awaited right away
+        pre = None
+        if not trusted:
+            now, pre = _split(conditions['pre'], executor)
+            _validate_now(now, new_globals)
+
+        # Stream the contract'd generator
+        return _Stream(function(*args, **kwargs),
+                       conditions,
+                       new_globals,
+                       executor,
+                       sample,
+                       pre)
+
+    # Measure the call, but not the consumption of the generator, which
+    # includes the validation of the awaited preconditions as well
+    def measured(trusted, args, kwargs):
+        measurement = _Measurement(name)
+        try:
+            new_globals = measurement.bind(bind, args, kwargs)
+            pre = None
+            if not trusted:
+                now, pre = _split(conditions['pre'], executor)
+                measurement.validate(_validate_now, now, new_globals)
+            return _Stream(measurement.run(function, args, kwargs),
+                           conditions,
+                           new_globals,
+                           executor,
+                           sample,
+                           pre)
+        finally:
+            measurement.stop()
+
+    _rename(function, checked, measured)
+
+    # Check conditions on every level of recursion
+    if recursion == 1:
+        return checked
+
+    # Check conditions on the outermost or on every n-th level of recursion
+    # only, the level is tracked per task, and it is kept while the generator
+    # is advanced, as the recursive calls are made by its body then
+    depth = _Depth()
+    def wrapper(*args, **kwargs):
+        level = depth.get()
+        if not level:
+            return _Leveled(checked(*args, **kwargs), depth, level)
+        # The inner levels are advanced by the outermost one, so they are
+        # running on its level already
+        if not recursion:
+            return function(*args, **kwargs)
+        if level % recursion:
+            return _Leveled(function(*args, **kwargs), depth, level)
+        return _Leveled(checked(*args, **kwargs), depth, level)
+    _rename(function, wrapper)
+    return wrapper
+
+
+#------------------------------------------------------------------------------#
+def wrap(function,
+         conditions,
+         bind,
+         caller,
+         recursion,
+         executor,
+         sample):
+    if isasyncgenfunction(function):
+        return _wrap_generator(
+            function, conditions, bind, caller, recursion, executor, sample)
+    name = _name(function)
+
+    # Create new guarded coroutine function
+    async def checked(*args, **kwargs):
+        # If the caller is trusted, skip the conditions
+        trusted = _trusted(_getframe(caller)) if _TRUSTED else 0
+        if trusted == _ALL:
+            return await function(*args, **kwargs)
+        # If there are instruments, measure the call
+        if _INSTRUMENTS:
+            return await measured(trusted, args, kwargs)
+        new_globals = bind(args, kwargs)
+
+        # Validate preconditions
+        if not trusted:
+            await _validate(conditions['pre'], new_globals, executor)
+
+        # Await the contract'd coroutine
+        result = await function(*args, **kwargs)
+
+        # Validate postconditions on the awaited result
+        await _validate(conditions['post'], new_globals, executor, True, result)
+
+        # Validate mutated postcoditions
+        await _validate(conditions['mut'], new_globals, executor)
+
+        # Return from the contract'd coroutine
+        return result
+
+    # Measure the phases of the call separately, the awaiting of the
+    # contract'd coroutine includes the time while it is suspended
+    async def measured(trusted, args, kwargs):
+        measurement = _Measurement(name)
+        try:
+            new_globals = measurement.bind(bind, args, kwargs)
+            if not trusted:
+                await _validate_measured(
+                    measurement, conditions['pre'], new_globals, executor)
+            started = default_timer()
+            try:
+                result = await function(*args, **kwargs)
+            finally:
+                measurement.running += default_timer() - started
+            await _validate_measured(measurement,
+                                     conditions['post'],
+                                     new_globals,
+                                     executor,
+                                     True,
+                                     result)
+            await _validate_measured(
+                measurement, conditions['mut'], new_globals, executor)
+            return result
+        finally:
+            measurement.stop()
+
+    _rename(function, checked, measured)
+
+    # Check conditions on every level of recursion
+    if recursion == 1:
+        return checked
+
+    # Check conditions on the outermost or on every n-th level of recursion
+    # only, the level is tracked per task, as the coroutine may be suspended
+    depth = _Depth()
+    async def wrapper(*args, **kwargs):
+        level = depth.get()
+        token = depth.enter(level)
+        try:
+            if level and (not recursion or level % recursion):
+                return await function(*args, **kwargs)
+            return await checked(*args, **kwargs)
+        finally:
+            depth.leave(token)
+    _rename(function, wrapper)
+    return wrapper
@@ -0,0 +1,148 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from itertools import islice
+from inspect   import isgeneratorfunction
+try:
+    from inspect import iscoroutinefunction
+except ImportError:
+    def iscoroutinefunction(function):
+        return False
+try:
+    from inspect import isasyncgenfunction
+except ImportError:
+    def isasyncgenfunction(function):
+        return False
+
+__all__ = 'batch',
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Size of the chunks, if only a pool is given
+_CHUNK_SIZE = 256
+
+
+#------------------------------------------------------------------------------#
+def _invoke(task):
+    # Call the undecorated function via the decorated one, so that process
+    # pools can pickle the function by its name
+    decorated, args = task
+    return decorated.unchecked(*args)
+
+
+#------------------------------------------------------------------------------#
+def _validate(conditions,
+              chunk,
+              results = None):
+    for assumption, message in conditions.items():
+        # Store original globals values only once for the whole chunk
+        assumption_globals = assumption.__globals__
+        old_globals = {}
+        for new_globals in chunk:
+            for variable in new_globals:
+                if (variable not in old_globals and
+                    variable in assumption_globals):
+                        old_globals[variable] = assumption_globals[variable]
+
+        # Invoke validator for every arguments of the chunk
+        try:
+            if results is None:
+                for new_globals in chunk:
+                    assumption_globals.update(new_globals)
+                    assert assumption(), message
+            else:
+                for new_globals, result in zip(chunk, results):
+                    assumption_globals.update(new_globals)
+                    assert assumption(result), message
+        finally:
+            # Restore original global values
+            assumption_globals.update(old_globals)
+
+
+#------------------------------------------------------------------------------#
+def _each(decorated, iterable):
+    # Call the decorated function for each of the arguments, so every call is
+    # checked as if it was called directly
+    for args in iterable:
+        yield decorated(*args)
+
+
+#------------------------------------------------------------------------------#
+def _chunked(decorated, function, conditions, bind, iterable, chunksize, pool):
+    iterator = iter(iterable)
+    while True:
+        chunk = [tuple(args) for args in islice(iterator, chunksize)]
+        if not chunk:
+            return
+        bound = [bind(args, {}) for args in chunk]
+
+        # Validate preconditions of the whole chunk
+        _validate(conditions['pre'], bound)
+
+        # Call the undecorated function directly, or in the pool
+        if pool is None:
+            results = [function(*args) for args in chunk]
+        else:
+            dispatch = getattr(pool, 'imap', None) or pool.map
+            results = list(dispatch(_invoke,
+                                    [(decorated, args) for args in chunk]))
+
+        # Validate postconditions of the whole chunk
+        _validate(conditions['post'], bound, results)
+
+        # Validate mutated postcoditions of the whole chunk
+        _validate(conditions['mut'], bound)
+
+        # Stream the results of the chunk
+        for result in results:
+            yield result
+
+
+#------------------------------------------------------------------------------#
+def batch(decorated,
+          function,
+          conditions,
+          bind):
+    # Generators and coroutines are validated while they are consumed, so the
+    # batch entry point of them is just calling the decorated function
+    if (isgeneratorfunction(function)
+        or iscoroutinefunction(function)
+        or isasyncgenfunction(function)):
+        def batched(iterable,
+                    chunksize = None,
+                    pool      = None):
+            return _each(decorated, iterable)
+        return batched
+
+    def batched(iterable,
+                chunksize = None,
+                pool      = None):
+        # Checking the conditions of a whole chunk at once changes when they
+        # are checked relative to the calls, so it is used only if asked for
+        if chunksize is None and pool is None:
+            return _each(decorated, iterable)
+        return _chunked(decorated,
+                        function,
+                        conditions,
+                        bind,
+                        iterable,
+                        chunksize or _CHUNK_SIZE,
+                        pool)
+    return batched
@@ -18,16 +18,48 @@ You should have received a copy of the GNU Lesser General Public License along
 with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from inspect     import getargspec
+from sys         import _getframe
+from functools   import update_wrapper
+from inspect     import isgeneratorfunction
 from collections import OrderedDict
+try:
+    from inspect import getfullargspec
+except ImportError:
+    from inspect import getargspec
+    def getfullargspec(function):
+        return tuple(getargspec(function)) + ([], None, {})
+try:
+    from inspect import iscoroutinefunction
+except ImportError:
+    def iscoroutinefunction(function):
+        return False
+try:
+    from inspect import isasyncgenfunction
+except ImportError:
+    def isasyncgenfunction(function):
+        return False
+try:
+    from contextvars import ContextVar
+except ImportError:
+    from threading import local
+    ContextVar = None
 # TODO: Consider switching to Decompyle++ https://github.com/zrax/pycdc for
 #       more reliable Python3 support
-from uncompyle6  import PYTHON_VERSION, deparse_code
+try:
+    from uncompyle6 import PYTHON_VERSION, deparse_code
+# Newer versions of uncompyle6 are not able to decompile the bytecode of the
+# Python versions they are running on, and the deparse_code is removed as well
+except ImportError:
+    deparse_code = None
 try:
     from cStringIO import StringIO
     from itertools import izip as zip
 except ModuleNotFoundError:
     from io import StringIO
+from pcd._trust      import _TRUSTED, _ALL, _trusted
+from pcd._batch      import batch
+from pcd._parallel   import validate_parallel
+from pcd._instrument import _INSTRUMENTS, _Measurement, _name, _rename
 
 __all__ = 'contract',
 
@@ -41,6 +73,40 @@ __all__ = 'contract',
 _LAMBDA_NAME = (lambda: None).__name__
 
 
+#------------------------------------------------------------------------------#
+# Recursion depth of a contract'd function, tracked per thread, and where
+# context variables are available, per asynchronous task as well
+if ContextVar is not None:
+    class _Depth(object):
+
+        def __init__(self):
+            self._level = ContextVar('depth', default=0)
+
+        def get(self):
+            return self._level.get()
+
+        def enter(self, level):
+            return self._level.set(level + 1)
+
+        def leave(self, token):
+            self._level.reset(token)
+else:
+    class _Depth(object):
+
+        def __init__(self):
+            self._local = local()
+
+        def get(self):
+            return getattr(self._local, 'level', 0)
+
+        def enter(self, level):
+            self._local.level = level + 1
+            return level
+
+        def leave(self, token):
+            self._local.level = token
+
+
 #------------------------------------------------------------------------------#
 def prepare_conditions(conditions,
                        conditions_type,
@@ -52,13 +118,19 @@ def prepare_conditions(conditions,
     composed = OrderedDict()
     for condition in conditions:
         # Get source from bytecode if it is an anonym function
-        if condition.__name__ == _LAMBDA_NAME:
+        if condition.__name__ == _LAMBDA_NAME and deparse_code is not None:
             condition_repr = StringIO()
             deparse_code(PYTHON_VERSION,
                          condition.__code__,
                          out=condition_repr).text
             # Remove 'return '
             condition_repr = condition_repr.getvalue()[7:]
+        # Use the location of the anonym function if it cannot be decompiled
+        elif condition.__name__ == _LAMBDA_NAME:
+            condition_repr = '{} at {}:{}'.format(
+                _LAMBDA_NAME,
+                condition.__code__.co_filename,
+                condition.__code__.co_firstlineno)
         # Use the validator name
         else:
             condition_repr = condition.__name__
@@ -98,84 +170,403 @@ def _inject_invoke(assumption,
 
 
 #------------------------------------------------------------------------------#
-def contract(pre  = (),
-             post = (),
-             mut  = ()):
-    def decorator(function):
-        # Prepare assumptions
-        func_name = function.__name__
-        prepared_pre  = prepare_conditions(pre, 'precondition', func_name)
-        prepared_post = prepare_conditions(post, 'postcondition', func_name)
-        prepared_mut  = prepare_conditions(mut, 'mutated-condition', func_name)
+def _validate(conditions,
+              new_globals,
+              takes_args = False,
+              result     = None):
+    for assumption, message in conditions.items():
+        _inject_invoke(assumption, new_globals, message, takes_args, result)
 
-        # Strore function related information
-        (function_args,
-         function_varargs,
-         function_keywords,
-         function_defaults) = getargspec(function)
-        function_args = function_args or ()
-        function_defaults = dict(zip(reversed(function_args),
-                                     reversed(function_defaults or ())))
 
-        # Create new guarded function
-        def wrapper(*args, **kwargs):
-            # Construct arguments and store them as global variables in the
-            # assumption-function's scope
-            args_   = list(args)
-            kwargs_ = kwargs.copy()
-            new_globals = {}
-            for function_arg in function_args:
-                # If argument passed as a keyword argument
-                try:
-                    new_globals[function_arg] = kwargs_.pop(function_arg)
-                    continue
-                except KeyError:
-                    pass
-
-                # If argument passed as a positional argument
-                try:
-                    new_globals[function_arg] = args_.pop(0)
-                    continue
-                except IndexError:
-                    pass
-
-                # If argument not passed but has default value
-                try:
-                    new_globals[function_arg] = function_defaults[function_arg]
-                    continue
-                except KeyError:
-                    pass
-
-            # If catch-all positional arguments defined then set as the rest of
-            # the passed positional arguments
-            if function_varargs is not None:
-                new_globals[function_varargs] = args_
-            # If catch-all keyword arguments defined then set as the rest of the
-            # passed keyword arguments
-            if function_keywords is not None:
-                new_globals[function_keywords] = kwargs_
+#------------------------------------------------------------------------------#
+class _Stream(object):
+
+    # Validates the yielded items lazily, one at a time, and the returned value
+    # of the generator when it is exhausted
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, generator, conditions, new_globals, sample, validate):
+        self._generator   = generator
+        self._conditions  = conditions
+        self._validate    = validate
+        self._new_globals = new_globals
+        self._sample      = sample
+        self._count       = 0
+        self._exhausted   = False
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __iter__(self):
+        return self
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __next__(self):
+        return self._advance(next, self._generator)
+    next = __next__
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def send(self, value):
+        return self._advance(self._generator.send, value)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def throw(self, *args):
+        return self._advance(self._generator.throw, *args)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def close(self):
+        self._generator.close()
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def _advance(self, method, *args):
+        try:
+            item = method(*args)
+        except StopIteration as exception:
+            # Validate the conditions only the first time the generator is
+            # exhausted, as it will keep raising StopIteration after that
+            if not self._exhausted:
+                self._exhausted = True
+                # Validate postconditions on the returned value
+                result = getattr(exception, 'value', None)
+                self._validate(
+                    self._conditions['post'], self._new_globals, True, result)
+                # Validate mutated postcoditions
+                self._validate(self._conditions['mut'], self._new_globals)
+            raise
+
+        # Validate every n-th yielded item
+        if not self._count % self._sample:
+            self._validate(
+                self._conditions['each'], self._new_globals, True, item)
+        self._count += 1
+        return item
+
+
+#------------------------------------------------------------------------------#
+class _Leveled(object):
+
+    # Keeps the level of recursion of a generator while it is advanced, as the
+    # body of the generator is running only then, and not when it is called
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, generator, depth, level):
+        self._generator = generator
+        self._depth     = depth
+        self._level     = level
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __iter__(self):
+        return self
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __next__(self):
+        return self._advance(next, self._generator)
+    next = __next__
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def send(self, value):
+        return self._advance(self._generator.send, value)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def throw(self, *args):
+        return self._advance(self._generator.throw, *args)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def close(self):
+        self._advance(self._generator.close)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __getattr__(self, name):
+        return getattr(self._generator, name)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def _advance(self, method, *args):
+        token = self._depth.enter(self._level)
+        try:
+            return method(*args)
+        finally:
+            self._depth.leave(token)
+
+
+#------------------------------------------------------------------------------#
+def _binder(function):
+    # Strore function related information
+    (function_args,
+     function_varargs,
+     function_keywords,
+     function_defaults,
+     function_kwonlyargs,
+     function_kwonlydefaults) = getfullargspec(function)[:6]
+    function_args = function_args or ()
+    function_defaults = dict(zip(reversed(function_args),
+                                 reversed(function_defaults or ())))
+    function_defaults.update(function_kwonlydefaults or {})
+
+    def bind(args, kwargs):
+        # Construct arguments and store them as global variables in the
+        # assumption-function's scope
+        args_   = list(args)
+        kwargs_ = kwargs.copy()
+        new_globals = {}
+        for function_arg in function_args:
+            # If argument passed as a keyword argument
+            try:
+                new_globals[function_arg] = kwargs_.pop(function_arg)
+                continue
+            except KeyError:
+                pass
+
+            # If argument passed as a positional argument
+            try:
+                new_globals[function_arg] = args_.pop(0)
+                continue
+            except IndexError:
+                pass
+
+            # If argument not passed but has default value
+            try:
+                new_globals[function_arg] = function_defaults[function_arg]
+                continue
+            except KeyError:
+                pass
+
+        # Keyword-only arguments are either passed as keyword arguments or
+        # have default values
+        for function_arg in function_kwonlyargs:
+            try:
+                new_globals[function_arg] = kwargs_.pop(function_arg)
+                continue
+            except KeyError:
+                pass
+
+            try:
+                new_globals[function_arg] = function_defaults[function_arg]
+                continue
+            except KeyError:
+                pass
+
+        # If catch-all positional arguments defined then set as the rest of
+        # the passed positional arguments
+        if function_varargs is not None:
+            new_globals[function_varargs] = args_
+        # If catch-all keyword arguments defined then set as the rest of the
+        # passed keyword arguments
+        if function_keywords is not None:
+            new_globals[function_keywords] = kwargs_
+        return new_globals
+    return bind
+
+
+#------------------------------------------------------------------------------#
+def _wrap(function,
+          conditions,
+          bind,
+          caller,
+          recursion,
+          sample,
+          parallel):
+    # Evaluate independent conditions in parallel, or one after another
+    validate = validate_parallel if parallel else _validate
+    name = _name(function)
+
+    # Create new guarded generator function, which validates the items and
+    # the returned value of the generator while it is being consumed
+    if isgeneratorfunction(function):
+        def checked(*args, **kwargs):
+            # If the caller is trusted, skip the conditions
+            trusted = _trusted(_getframe(caller)) if _TRUSTED else 0
+            if trusted == _ALL:
+                return function(*args, **kwargs)
+            # If there are instruments, measure the call
+            if _INSTRUMENTS:
+                return measured(trusted, args, kwargs)
+            new_globals = bind(args, kwargs)
+
+            # Validate preconditions
+            if not trusted:
+                validate(conditions['pre'], new_globals)
+
+            # Stream the contract'd generator
+            return _Stream(function(*args, **kwargs),
+                           conditions,
+                           new_globals,
+                           sample,
+                           validate)
+
+        # Measure the call, but not the consumption of the generator
+        def measured(trusted, args, kwargs):
+            measurement = _Measurement(name)
+            try:
+                new_globals = measurement.bind(bind, args, kwargs)
+                if not trusted:
+                    measurement.validate(
+                        validate, conditions['pre'], new_globals)
+                return _Stream(measurement.run(function, args, kwargs),
+                               conditions,
+                               new_globals,
+                               sample,
+                               validate)
+            finally:
+                measurement.stop()
+
+    # Create new guarded function
+    else:
+        def checked(*args, **kwargs):
+            # If the caller is trusted, skip the conditions
+            trusted = _trusted(_getframe(caller)) if _TRUSTED else 0
+            if trusted == _ALL:
+                return function(*args, **kwargs)
+            # If there are instruments, measure the call
+            if _INSTRUMENTS:
+                return measured(trusted, args, kwargs)
+            new_globals = bind(args, kwargs)
 
             # Validate preconditions
-            for assumption, message in wrapper.__conditions['pre'].items():
-                _inject_invoke(assumption, new_globals, message)
+            if not trusted:
+                validate(conditions['pre'], new_globals)
 
             # Call the contract'd function
             result = function(*args, **kwargs)
 
             # Validate postconditions
-            for assumption, message in wrapper.__conditions['post'].items():
-                _inject_invoke(assumption, new_globals, message, True, result)
+            validate(conditions['post'], new_globals, True, result)
 
             # Validate mutated postcoditions
-            for assumption, message in wrapper.__conditions['mut'].items():
-                _inject_invoke(assumption, new_globals, message)
+            validate(conditions['mut'], new_globals)
 
             # Return from the contract'd function
             return result
 
+        # Measure the phases of the call separately
+        def measured(trusted, args, kwargs):
+            measurement = _Measurement(name)
+            try:
+                new_globals = measurement.bind(bind, args, kwargs)
+                if not trusted:
+                    measurement.validate(
+                        validate, conditions['pre'], new_globals)
+                result = measurement.run(function, args, kwargs)
+                measurement.validate(
+                    validate, conditions['post'], new_globals, True, result)
+                measurement.validate(validate, conditions['mut'], new_globals)
+                return result
+            finally:
+                measurement.stop()
+
+    # Check conditions on every level of recursion
+    if recursion == 1:
+        wrapper = checked
+    # Check conditions on the outermost or on every n-th level of recursion
+    # only, the level is kept while the generator is advanced, as the recursive
+    # calls are made by its body then
+    elif isgeneratorfunction(function):
+        depth = _Depth()
+        def wrapper(*args, **kwargs):
+            level = depth.get()
+            if not level:
+                return _Leveled(checked(*args, **kwargs), depth, level)
+            # The inner levels are advanced by the outermost one, so they are
+            # running on its level already
+            if not recursion:
+                return function(*args, **kwargs)
+            if level % recursion:
+                return _Leveled(function(*args, **kwargs), depth, level)
+            return _Leveled(checked(*args, **kwargs), depth, level)
+    # Check conditions on the outermost level only, and call the inner
+    # levels of recursion without checking them (the recursive calls still go
+    # through this wrapper, as they are looking up the decorated function)
+    elif not recursion:
+        depth = _Depth()
+        def wrapper(*args, **kwargs):
+            if depth.get():
+                return function(*args, **kwargs)
+            token = depth.enter(0)
+            try:
+                return checked(*args, **kwargs)
+            finally:
+                depth.leave(token)
+    # Check conditions on every n-th level of recursion only
+    else:
+        depth = _Depth()
+        def wrapper(*args, **kwargs):
+            level = depth.get()
+            token = depth.enter(level)
+            try:
+                if level % recursion:
+                    return function(*args, **kwargs)
+                return checked(*args, **kwargs)
+            finally:
+                depth.leave(token)
+    _rename(function, checked, measured, wrapper)
+    return wrapper
+
+
+#------------------------------------------------------------------------------#
+def contract(pre       = (),
+             post      = (),
+             mut       = (),
+             recursion = 1,
+             monitor   = False,
+             executor  = False,
+             each      = (),
+             sample    = 1,
+             parallel  = False):
+    def decorator(function):
+        # Prepare assumptions
+        func_name = function.__name__
+        prepared_pre  = prepare_conditions(pre, 'precondition', func_name)
+        prepared_post = prepare_conditions(post, 'postcondition', func_name)
+        prepared_mut  = prepare_conditions(mut, 'mutated-condition', func_name)
+        prepared_each = prepare_conditions(each, 'item-condition', func_name)
+
         # Store conditions for extensibility
-        wrapper.__conditions = {'pre'  : prepared_pre,
-                                'post' : prepared_post,
-                                'mut'  : prepared_mut}
+        conditions = {'pre'  : prepared_pre,
+                      'post' : prepared_post,
+                      'mut'  : prepared_mut,
+                      'each' : prepared_each}
+
+        bind = _binder(function)
+        # Depth of the frame of the contract'd function's caller
+        caller = 1 if recursion == 1 else 2
+
+        # If possible, check the conditions via monitoring the events of the
+        # function's code object, instead of wrapping the function
+        if monitor:
+            # Imported here, as the module depends on this one
+            from pcd._monitor import attach
+            if attach(function, conditions, recursion):
+                function.map = batch(
+                    function, function.unchecked, conditions, bind)
+                return function
+
+        # Create new guarded coroutine or asynchronous generator function
+        if iscoroutinefunction(function) or isasyncgenfunction(function):
+            # Imported here, as the module is available on Python 3.5+ only
+            from pcd._async import wrap
+            wrapper = wrap(function,
+                           conditions,
+                           bind,
+                           caller,
+                           recursion,
+                           executor,
+                           sample)
+        # Create new guarded function or generator function
+        else:
+            wrapper = _wrap(function,
+                            conditions,
+                            bind,
+                            caller,
+                            recursion,
+                            sample,
+                            parallel)
+
+        # Keep the name and the documentation of the contract'd function, and
+        # expose it undecorated and via the batch entry point as well
+        update_wrapper(wrapper, function)
+        wrapper.unchecked = function
+        wrapper.map = batch(wrapper, function, conditions, bind)
+        wrapper.__conditions = conditions
         return wrapper
     return decorator
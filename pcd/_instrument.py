@@ -0,0 +1,115 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from timeit import default_timer
+
+__all__ = 'add', 'remove'
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Active instruments, which are notified about the checked calls
+_INSTRUMENTS = []
+
+
+#------------------------------------------------------------------------------#
+def add(instrument):
+    if instrument not in _INSTRUMENTS:
+        _INSTRUMENTS.append(instrument)
+
+
+#------------------------------------------------------------------------------#
+def remove(instrument):
+    try:
+        _INSTRUMENTS.remove(instrument)
+    except ValueError:
+        pass
+
+
+#------------------------------------------------------------------------------#
+def _name(function):
+    # Name of the contract reported to the instruments
+    return '{}.{}'.format(function.__module__,
+                          getattr(function, '__qualname__', function.__name__))
+
+
+#------------------------------------------------------------------------------#
+def _rename(function, *wrappers):
+    # Name the code objects of the wrappers after the contract'd function, so
+    # profilers and tracebacks are not showing the same anonymous wrapper for
+    # all the contract'd functions (code objects can be renamed on 3.8+ only)
+    names = {'co_name': function.__name__}
+    if hasattr(function.__code__, 'co_qualname'):
+        names['co_qualname'] = function.__qualname__
+    for wrapper in wrappers:
+        try:
+            wrapper.__code__ = wrapper.__code__.replace(**names)
+        except AttributeError:
+            return
+
+
+#------------------------------------------------------------------------------#
+class _Measurement(object):
+
+    # Time spent binding the arguments, checking the conditions and running the
+    # contract'd function during a single call, in seconds
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, name):
+        self.name     = name
+        self.binding  = 0.0
+        self.checking = 0.0
+        self.running  = 0.0
+        self.failed   = False
+        # Notify the same instruments about the start and the stop of the call
+        self._instruments = tuple(_INSTRUMENTS)
+        for instrument in self._instruments:
+            instrument.start(self)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def bind(self, bind, args, kwargs):
+        started = default_timer()
+        try:
+            return bind(args, kwargs)
+        finally:
+            self.binding += default_timer() - started
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def validate(self, validate, *args):
+        started = default_timer()
+        try:
+            validate(*args)
+        except AssertionError:
+            self.failed = True
+            raise
+        finally:
+            self.checking += default_timer() - started
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def run(self, function, args, kwargs):
+        started = default_timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.running += default_timer() - started
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def stop(self):
+        for instrument in self._instruments:
+            instrument.stop(self)
@@ -20,6 +20,7 @@ with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from inspect       import isfunction
 from pcd._contract import contract, prepare_conditions
+from pcd._analysis import resolver, reads, writes
 
 __all__ = 'Invariant',
 
@@ -70,6 +71,26 @@ def _add_conditions(function, function_name, **conditions):
         return function
 
 
+#------------------------------------------------------------------------------#
+def _selector(conditions, attributes, base_classes):
+    # Return a function which selects the conditions which may be affected by a
+    # method, that is, the conditions reading any of the attributes the method
+    # may change.  If any of these cannot be told, select all the conditions
+    is_plain = resolver(attributes, base_classes)
+    if is_plain is None:
+        return lambda method: conditions
+    read = [(condition, reads(condition, is_plain)) for condition in conditions]
+
+    def select(method):
+        # Analyse the undecorated function if it is already contract'd
+        written = writes(getattr(method, 'unchecked', method), is_plain)
+        if written is None:
+            return conditions
+        return {condition for condition, attributes in read
+                          if attributes is None or attributes & written}
+    return select
+
+
 #------------------------------------------------------------------------------#
 class Invariant(type):
 
@@ -95,7 +116,9 @@ class Invariant(type):
         except KeyError:
             pass
 
-        # Add contracts to all public functions
+        # Add contracts to all public functions, the conditions are checked
+        # after the methods only if the methods may affect them
+        select = _selector(conditions, attributes, base_classes)
         for name, attribute in attributes.items():
             if name == conditions_attribute:
                 continue
@@ -114,24 +137,24 @@ class Invariant(type):
                         attribute,
                         '{}.{}'.format(class_name, name),
                         pre=conditions,
-                        mut=conditions)
+                        mut=select(attribute))
                 elif isinstance(attribute, property):
                     attributes[name] = property(
                         fget=_add_conditions(
                             attribute.fget,
                             '{}.{}: getter'.format(class_name, name),
                             pre=conditions,
-                            mut=conditions),
+                            mut=select(attribute.fget)),
                         fset=_add_conditions(
                             attribute.fset,
                             '{}.{}: setter'.format(class_name, name),
                             pre=conditions,
-                            mut=conditions),
+                            mut=select(attribute.fset)),
                         fdel=_add_conditions(
                             attribute.fdel,
                             '{}.{}: deleter'.format(class_name, name),
                             pre=conditions,
-                            mut=conditions))
+                            mut=select(attribute.fdel)))
 
         # Return new class
         return super(Invariant, self).__new__(
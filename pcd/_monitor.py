@@ -0,0 +1,255 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from sys           import _getframe
+from types         import FunctionType
+from inspect       import isfunction
+from weakref       import ref
+from threading     import local
+from pcd._contract import _inject_invoke
+try:
+    from sys import monitoring
+except ImportError:
+    monitoring = None
+
+__all__ = 'attach',
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Free tool identifiers, which are not reserved by the standard library
+_TOOL_IDS  = 4, 3
+_TOOL_NAME = 'pcd'
+# Flags of the code objects marking catch-all arguments, and the generator,
+# coroutine and asynchronous generator functions
+_VARARGS   = 0x04
+_VARKW     = 0x08
+_SUSPENDED = 0x20 | 0x80 | 0x100 | 0x200
+# Contracts of the monitored functions by the identities of their code objects,
+# as code objects are compared by their values
+_CONTRACTS = {}
+# Arguments bound on the entry of the monitored frames, which are running in
+# the current thread
+_PENDING   = local()
+_tool_id   = None
+
+
+#------------------------------------------------------------------------------#
+def _bind(frame, names):
+    # Get the arguments as they are bound in the frame of the contract'd
+    # function on its entry
+    frame_locals = frame.f_locals
+    return {name: frame_locals[name] for name in names if name in frame_locals}
+
+
+#------------------------------------------------------------------------------#
+def _pending():
+    try:
+        return _PENDING.frames
+    except AttributeError:
+        _PENDING.frames = []
+        return _PENDING.frames
+
+
+#------------------------------------------------------------------------------#
+def _prune(pending, frame):
+    # Frames unwound by exceptions are not reported, so drop the arguments of
+    # the frames which are not the callers of the starting one anymore
+    while pending:
+        top    = pending[-1][0]
+        caller = frame.f_back
+        while caller is not None and caller is not top:
+            caller = caller.f_back
+        if caller is not None:
+            return
+        pending.pop()
+
+
+#------------------------------------------------------------------------------#
+def _level(pending, code):
+    # Get the level of recursion from the closest frame of the same function
+    for frame, new_globals, level in reversed(pending):
+        if frame.f_code is code:
+            return level + 1
+    return 0
+
+
+#------------------------------------------------------------------------------#
+def _start(code, instruction_offset):
+    code_ref, names, conditions, recursion = _CONTRACTS[id(code)]
+
+    # If only the outermost level is checked, and it is called directly by the
+    # same function, then it is an inner level, which is skipped right away
+    frame = _getframe(1)
+    if not recursion:
+        caller = frame.f_back
+        if caller is not None and caller.f_code is code:
+            return
+
+    # If there is nothing to check, stop monitoring it
+    checks_exit = conditions['post'] or conditions['mut']
+    if not (conditions['pre'] or checks_exit):
+        return monitoring.DISABLE
+
+    # Keep the arguments as they were passed for the exit of the function, as
+    # the function may rebind or delete them, and keep the levels of recursion
+    # of the frames, unless every level is checked
+    if checks_exit or recursion != 1:
+        pending = _pending()
+        _prune(pending, frame)
+
+    # The inner levels of recursion, which are not checked, are only counted,
+    # and as they are not wrapped, they are not using any extra frames
+    level = 0 if recursion == 1 else _level(pending, code)
+    if level and (not recursion or level % recursion):
+        pending.append((frame, None, level))
+        return
+
+    # Validate preconditions
+    new_globals = _bind(frame, names)
+    for assumption, message in conditions['pre'].items():
+        _inject_invoke(assumption, new_globals, message)
+
+    if checks_exit or recursion != 1:
+        pending.append((frame, new_globals, level))
+
+
+#------------------------------------------------------------------------------#
+def _return(code, instruction_offset, result):
+    code_ref, names, conditions, recursion = _CONTRACTS[id(code)]
+
+    # Skip the inner levels, which were skipped on entry
+    frame = _getframe(1)
+    if not recursion:
+        caller = frame.f_back
+        if caller is not None and caller.f_code is code:
+            return
+
+    # If there is nothing to check on exit, and the levels of recursion are not
+    # counted, stop monitoring this return
+    if not (conditions['post'] or conditions['mut'] or recursion != 1):
+        return monitoring.DISABLE
+
+    # Get the arguments bound on the entry, the arguments of the frames called
+    # by this one and unwound by exceptions are dropped
+    pending = _pending()
+    while pending:
+        pending_frame, new_globals, level = pending.pop()
+        if pending_frame is frame:
+            break
+    # If the frame has been entered before the conditions were added
+    else:
+        new_globals = _bind(frame, names)
+
+    # If it is an inner level of recursion, which is not checked
+    if new_globals is None:
+        return
+
+    # Validate postconditions
+    for assumption, message in conditions['post'].items():
+        _inject_invoke(assumption, new_globals, message, True, result)
+
+    # Validate mutated postcoditions
+    for assumption, message in conditions['mut'].items():
+        _inject_invoke(assumption, new_globals, message)
+
+
+#------------------------------------------------------------------------------#
+def _unchecked(function):
+    # Events are monitored per code object, therefore a copy of the function
+    # with a copy of its code object is not checked at all
+    unchecked = FunctionType(function.__code__.replace(),
+                             function.__globals__,
+                             function.__name__,
+                             function.__defaults__,
+                             function.__closure__)
+    unchecked.__kwdefaults__ = function.__kwdefaults__
+    unchecked.__qualname__   = function.__qualname__
+    unchecked.__doc__        = function.__doc__
+    return unchecked
+
+
+#------------------------------------------------------------------------------#
+def _arm(code):
+    # Setting the events again re-enables the ones which were disabled by the
+    # event handlers of this tool only, and not those of the other tools
+    monitoring.set_local_events(_tool_id, code, 0)
+    monitoring.set_local_events(_tool_id,
+                                code,
+                                monitoring.events.PY_START |
+                                monitoring.events.PY_RETURN)
+
+
+#------------------------------------------------------------------------------#
+def _claim():
+    global _tool_id
+    if _tool_id is None:
+        for tool_id in _TOOL_IDS:
+            if monitoring.get_tool(tool_id) is None:
+                monitoring.use_tool_id(tool_id, _TOOL_NAME)
+                monitoring.register_callback(
+                    tool_id, monitoring.events.PY_START, _start)
+                monitoring.register_callback(
+                    tool_id, monitoring.events.PY_RETURN, _return)
+                _tool_id = tool_id
+                break
+    return _tool_id
+
+
+#------------------------------------------------------------------------------#
+def attach(function, conditions, recursion):
+    # If monitoring is not available, or the function is not a plain one then
+    # it cannot be monitored
+    if (monitoring is None
+        or not isfunction(function)
+        or function.__code__.co_flags & _SUSPENDED):
+            return False
+    code = function.__code__
+    try:
+        # Extend the conditions of a function already monitored
+        code_ref, names, monitored_conditions = _CONTRACTS[id(code)][:3]
+        for type, prepared in conditions.items():
+            monitored_conditions[type].update(prepared)
+        _CONTRACTS[id(code)] = code_ref, names, monitored_conditions, recursion
+        _arm(code)
+        return True
+    except KeyError:
+        pass
+    if _claim() is None:
+        return False
+
+    # Nested functions created from the same definition share their code
+    # objects, therefore the function gets its own copy to be monitored, which
+    # is forgotten together with the function
+    code = function.__code__ = code.replace()
+    code_ref = ref(code, lambda _, key=id(code): _CONTRACTS.pop(key, None))
+
+    # Collect the argument names
+    count = code.co_argcount + code.co_kwonlyargcount
+    count += bool(code.co_flags & _VARARGS) + bool(code.co_flags & _VARKW)
+
+    # Start monitoring the entry and the exit of the function
+    _CONTRACTS[id(code)] = (code_ref,
+                            code.co_varnames[:count],
+                            conditions,
+                            recursion)
+    function.__conditions = conditions
+    function.unchecked = _unchecked(function)
+    _arm(code)
+    return True
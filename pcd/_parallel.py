@@ -0,0 +1,148 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from os                   import getpid
+from sys                  import exc_info
+from types                import FunctionType
+from timeit               import default_timer
+from threading            import Lock, local
+from multiprocessing      import cpu_count
+from multiprocessing.pool import ThreadPool
+
+__all__ = 'validate_parallel',
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Conditions running faster than this (in seconds) are evaluated inline, as the
+# overhead of dispatching them would dominate
+_INLINE_THRESHOLD = 1e-4
+# Last measured running times of the conditions
+_COSTS = {}
+# Shared thread pool, created on first use in each process
+_POOL_LOCK = Lock()
+_pool      = None
+_pool_pid  = None
+# Marks the threads of the pool
+_WORKER    = local()
+
+
+#------------------------------------------------------------------------------#
+def _mark_worker():
+    _WORKER.active = True
+
+
+#------------------------------------------------------------------------------#
+def _get_pool():
+    global _pool, _pool_pid
+    # The threads of the pool are not running in a forked process, so the
+    # process creates its own pool
+    if _pool_pid != getpid():
+        with _POOL_LOCK:
+            if _pool_pid != getpid():
+                _pool     = ThreadPool(cpu_count(), _mark_worker)
+                _pool_pid = getpid()
+    return _pool
+
+
+#------------------------------------------------------------------------------#
+def _isolate(assumption, new_globals):
+    # Conditions which are suspended or running in another thread cannot have
+    # their arguments injected into the shared globals, as other coroutines or
+    # threads may use the same globals in the meantime, therefore create a copy
+    # of the condition which has its own globals
+    isolated_globals = assumption.__globals__.copy()
+    isolated_globals.update(new_globals)
+    return FunctionType(assumption.__code__,
+                        isolated_globals,
+                        assumption.__name__,
+                        assumption.__defaults__,
+                        assumption.__closure__)
+
+
+#------------------------------------------------------------------------------#
+def _timed(assumption, arguments):
+    # Invoke validator and measure its running time
+    started = default_timer()
+    try:
+        return assumption(*arguments), None, default_timer() - started
+    except Exception:
+        return None, exc_info()[1], default_timer() - started
+
+
+#------------------------------------------------------------------------------#
+def validate_parallel(conditions,
+                      new_globals,
+                      takes_args = False,
+                      result     = None):
+    arguments = (result,) if takes_args else ()
+
+    # Dispatch the expensive conditions to the pool, each with its own globals,
+    # unless this thread is a worker of the pool itself (i.e. the contract is
+    # checked by a dispatched condition), as waiting for the other workers could
+    # block all of them for ever
+    dispatch = len(conditions) > 1 and not getattr(_WORKER, 'active', False)
+    verdicts = []
+    for assumption, message in conditions.items():
+        if dispatch and _COSTS.get(assumption, 0) >= _INLINE_THRESHOLD:
+            verdict = _get_pool().apply_async(
+                _timed, (_isolate(assumption, new_globals), arguments))
+        else:
+            verdict = None
+        verdicts.append((assumption, message, verdict))
+
+    # Store original globals values and save new ones, only once for each of
+    # the distinct globals of the conditions evaluated inline
+    injected = {}
+    for assumption, _, verdict in verdicts:
+        assumption_globals = assumption.__globals__
+        if verdict is not None or id(assumption_globals) in injected:
+            continue
+        old_globals = {}
+        for variable, value in new_globals.items():
+            try:
+                old_globals[variable] = assumption_globals[variable]
+            except KeyError:
+                pass
+            assumption_globals[variable] = value
+        injected[id(assumption_globals)] = assumption_globals, old_globals
+
+    # Evaluate the cheap and the not yet measured conditions inline, as well as
+    # the only one
+    try:
+        for index, (assumption, message, verdict) in enumerate(verdicts):
+            if verdict is None:
+                verdicts[index] = assumption, message, _timed(assumption,
+                                                              arguments)
+    finally:
+        # Restore original global values
+        for assumption_globals, old_globals in injected.values():
+            assumption_globals.update(old_globals)
+
+    # Gather all verdicts before reporting, so that the first failure is
+    # reported in the order of declaration
+    for index, (assumption, message, verdict) in enumerate(verdicts):
+        if not isinstance(verdict, tuple):
+            verdict = verdict.get()
+        verdicts[index] = message, verdict[:2]
+        _COSTS[assumption] = verdict[2]
+    for message, (passed, exception) in verdicts:
+        if exception is not None:
+            raise exception
+        assert passed, message
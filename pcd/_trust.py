@@ -0,0 +1,71 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__all__ = 'trust', 'distrust'
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Conditions skipped for trusted callers
+_PRE       = 1
+_ALL       = 2
+# Trusted modules and packages, and whether postconditions are skipped for them
+_TRUSTED   = {}
+# Verdicts by the code objects of the callers
+_CALLERS   = {}
+
+
+#------------------------------------------------------------------------------#
+def _modules(modules):
+    # Make modules iterable if they are not
+    return (modules,) if isinstance(modules, str) else modules
+
+
+#------------------------------------------------------------------------------#
+def trust(modules,
+          skip_post = False):
+    for module in _modules(modules):
+        _TRUSTED[module] = skip_post
+    _CALLERS.clear()
+
+
+#------------------------------------------------------------------------------#
+def distrust(modules):
+    for module in _modules(modules):
+        _TRUSTED.pop(module, None)
+    _CALLERS.clear()
+
+
+#------------------------------------------------------------------------------#
+def _trusted(frame):
+    code = frame.f_code
+    try:
+        return _CALLERS[code]
+    except KeyError:
+        pass
+
+    # Decide if the caller's module is trusted or is a submodule of a trusted
+    # package, and cache the verdict for the caller's code object
+    module  = frame.f_globals.get('__name__', '')
+    verdict = 0
+    for trusted, skip_post in _TRUSTED.items():
+        if module == trusted or module.startswith(trusted + '.'):
+            verdict = max(verdict, _ALL if skip_post else _PRE)
+    _CALLERS[code] = verdict
+    return verdict
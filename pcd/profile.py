@@ -0,0 +1,169 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from __future__ import print_function
+
+from os.path   import abspath, dirname
+from sys       import argv, path, stderr, exit
+from runpy     import run_path, run_module
+from timeit    import default_timer
+from argparse  import ArgumentParser, REMAINDER
+from threading import Lock, local
+from pcd._instrument import add, remove
+
+__all__ = 'Profiler', 'main'
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+_COLUMNS = '{:<{}} {:>10} {:>12} {:>12} {:>12} {:>9}'
+_PHASES  = '[binding]', '[checking]'
+
+
+#------------------------------------------------------------------------------#
+class Profiler(object):
+
+    # Instrument attributing the time of the checked calls to binding the
+    # arguments, checking the conditions and running the contract'd functions,
+    # the time of the nested checked calls is excluded from the running time
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self):
+        self.functions = {}
+        self.stacks    = {}
+        self._local    = local()
+        # The totals are shared by the threads of the profiled program
+        self._lock     = Lock()
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def start(self, measurement):
+        try:
+            calls = self._local.calls
+        except AttributeError:
+            calls = self._local.calls = []
+        stack = calls[-1][1] + (measurement.name,) if calls else \
+                (measurement.name,)
+        calls.append([measurement, stack, 0.0, default_timer()])
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def stop(self, measurement):
+        stopped = default_timer()
+        calls   = self._local.calls
+        # Calls of coroutines and generators are not necessarily stopped in the
+        # reverse order of their starting
+        for index in range(len(calls) - 1, -1, -1):
+            if calls[index][0] is measurement:
+                break
+        else:
+            return
+        _, stack, nested, started = calls.pop(index)
+        if index:
+            calls[index - 1][2] += stopped - started
+
+        running = max(measurement.running - nested, 0.0)
+        with self._lock:
+            totals = self.functions.setdefault(measurement.name,
+                                               [0, 0.0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += measurement.binding
+            totals[2] += measurement.checking
+            totals[3] += running
+
+            for phase, seconds in zip(_PHASES + (None,),
+                                      (measurement.binding,
+                                       measurement.checking,
+                                       running)):
+                key = stack + (phase,) if phase else stack
+                self.stacks[key] = self.stacks.get(key, 0.0) + seconds
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def report(self, out=stderr, top=None):
+        # Print the functions ranked by the time spent on their contracts
+        with self._lock:
+            functions = [(name, tuple(totals))
+                         for name, totals in self.functions.items()]
+        ranked = sorted(functions,
+                        key=lambda item: item[1][1] + item[1][2],
+                        reverse=True)[:top]
+        width  = max([len('function')] + [len(name) for name, _ in ranked])
+        print(_COLUMNS.format('function', width, 'calls', 'binding (s)',
+                              'checking (s)', 'body (s)', 'overhead'), file=out)
+        for name, (calls, binding, checking, body) in ranked:
+            overhead = (binding + checking)/((binding + checking + body) or 1)
+            print(_COLUMNS.format(name,
+                                  width,
+                                  calls,
+                                  '{:.6f}'.format(binding),
+                                  '{:.6f}'.format(checking),
+                                  '{:.6f}'.format(body),
+                                  '{:.2%}'.format(overhead)), file=out)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def collapse(self, file):
+        # Write the stacks in the collapsed format of the flame graph tools,
+        # with the times in microseconds
+        with self._lock:
+            stacks = list(self.stacks.items())
+        for stack, seconds in sorted(stacks):
+            microseconds = int(round(seconds*1e6))
+            if microseconds:
+                print('{} {}'.format(';'.join(stack), microseconds), file=file)
+
+
+#------------------------------------------------------------------------------#
+def main(arguments=None):
+    parser = ArgumentParser(prog='python -m pcd.profile',
+                            description='Profile the overhead of contracts')
+    parser.add_argument('-o', '--collapsed',
+                        default='pcd.collapsed',
+                        help='path of the collapsed stacks for flame graphs')
+    parser.add_argument('-n', '--top',
+                        type=int,
+                        help='number of functions to report')
+    parser.add_argument('-m',
+                        dest='module',
+                        action='store_true',
+                        help='run the target as a module')
+    parser.add_argument('target', help='script or module to run')
+    parser.add_argument('arguments', nargs=REMAINDER)
+    arguments = parser.parse_args(argv[1:] if arguments is None else arguments)
+
+    if not __debug__:
+        parser.error('contracts are not checked with optimisations (-O)')
+
+    # Run the target as if it was run directly by the interpreter
+    argv[:] = [arguments.target] + arguments.arguments
+    profiler = Profiler()
+    add(profiler)
+    try:
+        if arguments.module:
+            run_module(arguments.target, run_name='__main__', alter_sys=True)
+        else:
+            path.insert(0, dirname(abspath(arguments.target)))
+            run_path(arguments.target, run_name='__main__')
+    finally:
+        remove(profiler)
+        profiler.report(top=arguments.top)
+        with open(arguments.collapsed, 'w') as file:
+            profiler.collapse(file)
+
+
+#------------------------------------------------------------------------------#
+if __name__ == '__main__':
+    exit(main())
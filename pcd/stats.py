@@ -0,0 +1,264 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from __future__ import print_function
+
+from os         import (open as open_fd, close, fstat, ftruncate, getpid, kill,
+                        O_RDWR, O_CREAT)
+from sys        import argv, stdout, stderr, exit
+from mmap       import mmap, ACCESS_READ
+from errno      import ESRCH
+from struct     import Struct
+from threading  import Lock
+from contextlib import contextmanager
+try:
+    from fcntl import lockf, LOCK_EX, LOCK_UN
+except ImportError:
+    lockf = None
+from pcd._instrument import add, remove
+
+__all__ = 'enable', 'disable', 'read', 'summary'
+
+
+#- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+# Layout of the file: a header, followed by one slot for each worker process,
+# each slot contains the process identifier of its owner and the counters of
+# the contracts checked by the owner.  Every process writes its own slot only,
+# therefore updating the counters requires no inter-process locking, the file
+# is locked only while a slot is claimed
+_MAGIC     = b'PCDSTAT1'
+_HEADER    = Struct('<8sII')
+_SLOT      = Struct('<q8x')
+_NAME      = Struct('<104s')
+_COUNTERS  = Struct('<QQQ')
+_ENTRY     = _NAME.size + _COUNTERS.size
+_SLOTS     = 64
+_ENTRIES   = 256
+_COLUMNS   = '{:<48} {:>12} {:>10} {:>8} {:>12} {:>12} {:>8}'
+_stats     = None
+
+
+#------------------------------------------------------------------------------#
+def _slot_size(entries):
+    return _SLOT.size + entries*_ENTRY
+
+
+#------------------------------------------------------------------------------#
+def _is_alive(pid):
+    try:
+        kill(pid, 0)
+    except OSError as error:
+        return error.errno != ESRCH
+    return True
+
+
+#------------------------------------------------------------------------------#
+class _Stats(object):
+
+    # Instrument recording the checked calls into the worker's own slot
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def __init__(self, path, slots, entries):
+        self._file = open_fd(path, O_RDWR | O_CREAT, 0o644)
+        with self._locked():
+            # Create the file if it is new, or use its layout if it exists
+            if not fstat(self._file).st_size:
+                ftruncate(self._file,
+                          _HEADER.size + slots*_slot_size(entries))
+                self._map = mmap(self._file, 0)
+                _HEADER.pack_into(self._map, 0, _MAGIC, slots, entries)
+            else:
+                self._map = mmap(self._file, 0)
+                magic, slots, entries = _HEADER.unpack_from(self._map, 0)
+                if magic != _MAGIC:
+                    raise ValueError('Not a statistics file: {}'.format(path))
+        self._slots   = slots
+        self._entries = entries
+        self._pid     = None
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    @contextmanager
+    def _locked(self):
+        # The locks of lockf are owned by the processes, unlike the ones of
+        # flock, which are shared by the forked processes via the inherited
+        # file descriptor
+        if lockf is None:
+            yield
+        else:
+            lockf(self._file, LOCK_EX)
+            try:
+                yield
+            finally:
+                lockf(self._file, LOCK_UN)
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def _claim(self):
+        # Called by a new process, or after the process has been forked, the
+        # other threads of the process are not recording anything until the
+        # slot is ready
+        self._slot = None
+        self._lock = Lock()
+        self._pid  = getpid()
+        with self._locked():
+            # Claim a free slot, or adopt the slot of a finished worker, so
+            # its counters are kept when workers are recycled
+            for slot in range(self._slots):
+                offset = _HEADER.size + slot*_slot_size(self._entries)
+                pid, = _SLOT.unpack_from(self._map, offset)
+                if not pid or pid == self._pid or not _is_alive(pid):
+                    _SLOT.pack_into(self._map, offset, self._pid)
+                    break
+            else:
+                return
+
+        # Index the entries already in the slot
+        index = {}
+        for entry in range(self._entries):
+            entry = offset + _SLOT.size + entry*_ENTRY
+            name, = _NAME.unpack_from(self._map, entry)
+            if not name.rstrip(b'\0'):
+                break
+            index[name] = entry
+        self._index = index
+        self._used  = len(index)
+        self._slot  = offset
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def _entry(self, name):
+        name = _NAME.pack(name.encode('utf-8'))[0:_NAME.size]
+        try:
+            return self._index[name]
+        except KeyError:
+            if self._used == self._entries:
+                return None
+        offset = self._slot + _SLOT.size + self._used*_ENTRY
+        _COUNTERS.pack_into(self._map, offset + _NAME.size, 0, 0, 0)
+        self._map[offset:offset + _NAME.size] = name
+        self._index[name] = offset
+        self._used += 1
+        return offset
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def start(self, measurement):
+        pass
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def stop(self, measurement):
+        if self._pid != getpid():
+            self._claim()
+        if self._slot is None:
+            return
+        with self._lock:
+            offset = self._entry(measurement.name)
+            if offset is None:
+                return
+            offset += _NAME.size
+            checks, failures, nanoseconds = _COUNTERS.unpack_from(self._map,
+                                                                  offset)
+            _COUNTERS.pack_into(
+                self._map,
+                offset,
+                checks + 1,
+                failures + measurement.failed,
+                nanoseconds + int((measurement.binding +
+                                   measurement.checking)*1e9))
+
+    #- - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - #
+    def close(self):
+        self._map.close()
+        close(self._file)
+
+
+#------------------------------------------------------------------------------#
+def enable(path,
+           slots   = _SLOTS,
+           entries = _ENTRIES):
+    global _stats
+    disable()
+    _stats = _Stats(path, slots, entries)
+    add(_stats)
+
+
+#------------------------------------------------------------------------------#
+def disable():
+    global _stats
+    if _stats is not None:
+        remove(_stats)
+        _stats.close()
+        _stats = None
+
+
+#------------------------------------------------------------------------------#
+def read(path):
+    # Aggregate the counters of all the slots by the contracts
+    contracts = {}
+    with open(path, 'rb') as file:
+        data = mmap(file.fileno(), 0, access=ACCESS_READ)
+        try:
+            magic, slots, entries = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC:
+                raise ValueError('Not a statistics file: {}'.format(path))
+            for slot in range(slots):
+                offset = _HEADER.size + slot*_slot_size(entries)
+                pid, = _SLOT.unpack_from(data, offset)
+                if not pid:
+                    continue
+                for entry in range(entries):
+                    entry = offset + _SLOT.size + entry*_ENTRY
+                    name, = _NAME.unpack_from(data, entry)
+                    name = name.rstrip(b'\0').decode('utf-8', 'replace')
+                    if not name:
+                        break
+                    checks, failures, nanoseconds = _COUNTERS.unpack_from(
+                        data, entry + _NAME.size)
+                    totals = contracts.setdefault(name, [0, 0, 0.0, 0])
+                    totals[0] += checks
+                    totals[1] += failures
+                    totals[2] += nanoseconds/1e9
+                    totals[3] += 1
+        finally:
+            data.close()
+    return {name: tuple(totals) for name, totals in contracts.items()}
+
+
+#------------------------------------------------------------------------------#
+def summary(path,
+            out = stdout):
+    # Print the contracts ranked by the total time spent checking them
+    print(_COLUMNS.format('contract', 'checks', 'failures', 'rate',
+                          'total (s)', 'mean (us)', 'slots'), file=out)
+    contracts = read(path)
+    for name, (checks, failures, seconds, slots) in sorted(
+            contracts.items(), key=lambda item: item[1][2], reverse=True):
+        print(_COLUMNS.format(name[-48:],
+                              checks,
+                              failures,
+                              '{:.2%}'.format(failures/float(checks or 1)),
+                              '{:.6f}'.format(seconds),
+                              '{:.3f}'.format(seconds/(checks or 1)*1e6),
+                              slots), file=out)
+
+
+#------------------------------------------------------------------------------#
+if __name__ == '__main__':
+    if len(argv) != 2:
+        print('usage: python -m pcd.stats <path>', file=stderr)
+        exit(2)
+    summary(argv[1])
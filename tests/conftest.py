@@ -0,0 +1,34 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from sys import version_info
+
+collect_ignore = []
+# Metaclasses and keyword-only arguments are declared by the syntax of Python 3
+# only
+if version_info < (3,):
+    collect_ignore.append('test_invariant_metaclass.py')
+    collect_ignore.append('test_keyword_only.py')
+# Coroutine functions are not valid syntax before Python 3.5, and asynchronous
+# generators before Python 3.6
+if version_info < (3, 5):
+    collect_ignore.append('test_async.py')
+if version_info < (3, 6):
+    collect_ignore.append('test_async_generator.py')
@@ -27,4 +27,4 @@ __all__ = 'raised_with_message',
 def raised_with_message(function, message):
     with raises(AssertionError) as exception_info:
         function()
-    assert str(exception_info.value.message).endswith(message)
+    assert str(exception_info.value).endswith(message)
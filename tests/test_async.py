@@ -0,0 +1,133 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from time               import sleep
+from asyncio            import new_event_loop, sleep as async_sleep
+from threading          import current_thread
+from concurrent.futures import ThreadPoolExecutor
+from pcd                import Invariant, contract
+from tests.helper       import raised_with_message
+
+
+#------------------------------------------------------------------------------#
+def run(coroutine):
+    loop = new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+#------------------------------------------------------------------------------#
+def test_awaited_result():
+    def is_positive():
+        return number > 0
+
+    def is_double(result):
+        return result == number*2
+
+    def is_extended():
+        return len(items) == 1
+
+    @contract(pre=is_positive, post=is_double, mut=is_extended)
+    async def double(number, items):
+        await async_sleep(0)
+        items.append(number)
+        return number*2 if number < 10 else number
+
+    assert run(double(3, [])) == 6
+    raised_with_message(lambda: run(double(0, [])), 'is_positive')
+    raised_with_message(lambda: run(double(10, [])), 'is_double')
+    raised_with_message(lambda: run(double(5, [None])), 'is_extended')
+
+
+#------------------------------------------------------------------------------#
+def test_async_conditions():
+    async def is_known():
+        await async_sleep(0)
+        return key in ('alpha', 'beta')
+
+    async def is_upper(result):
+        await async_sleep(0)
+        return result.isupper()
+
+    @contract(pre=is_known, post=is_upper)
+    async def lookup(key):
+        return key.upper() if key == 'alpha' else key
+
+    assert run(lookup('alpha')) == 'ALPHA'
+    raised_with_message(lambda: run(lookup('gamma')), 'is_known')
+    raised_with_message(lambda: run(lookup('beta')), 'is_upper')
+
+
+#------------------------------------------------------------------------------#
+def test_executor():
+    threads = []
+
+    def is_heavy():
+        threads.append(current_thread())
+        sleep(0.01)
+        return size < 100
+
+    with ThreadPoolExecutor(1) as executor:
+        @contract(pre=is_heavy, executor=executor)
+        async def allocate(size):
+            return bytearray(size)
+
+        assert len(run(allocate(10))) == 10
+        raised_with_message(lambda: run(allocate(1000)), 'is_heavy')
+    assert current_thread() not in threads
+
+
+#------------------------------------------------------------------------------#
+def test_recursion():
+    levels = []
+
+    def is_counted():
+        levels.append(n)
+        return True
+
+    @contract(pre=is_counted, recursion=0)
+    async def count(n):
+        return 0 if n == 0 else await count(n - 1) + 1
+
+    assert run(count(5)) == 5
+    assert levels == [5]
+
+
+#------------------------------------------------------------------------------#
+def test_invariant():
+    def is_positive():
+        return self._value > 0
+
+    class Class(metaclass=Invariant):
+
+        __conditions = is_positive,
+
+        def __init__(self):
+            self._value = 2
+
+        async def decrement(self):
+            await async_sleep(0)
+            self._value -= 1
+
+    instance = Class()
+    run(instance.decrement())
+    raised_with_message(lambda: run(instance.decrement()), 'is_positive')
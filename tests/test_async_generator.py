@@ -0,0 +1,145 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from asyncio          import sleep as async_sleep
+from pcd              import contract
+from tests.helper     import raised_with_message
+from tests.test_async import run
+
+
+#------------------------------------------------------------------------------#
+async def collect(generator):
+    return [item async for item in generator]
+
+
+#------------------------------------------------------------------------------#
+def test_items():
+    consumed = []
+
+    async def is_positive():
+        await async_sleep(0)
+        return count > 0
+
+    def is_small(item):
+        return item < 3
+
+    def is_none(result):
+        return result is None
+
+    def is_consumed():
+        return consumed == list(range(count))
+
+    @contract(pre=is_positive, post=is_none, mut=is_consumed, each=is_small)
+    async def produce(count):
+        for item in range(count):
+            await async_sleep(0)
+            consumed.append(item)
+            yield item
+
+    assert run(collect(produce(3))) == [0, 1, 2]
+    del consumed[:]
+    raised_with_message(lambda: run(collect(produce(0))), 'is_positive')
+    raised_with_message(lambda: run(collect(produce(4))), 'is_small')
+
+    # Mutated conditions are checked only when the generator is exhausted
+    generator = produce(2)
+    del consumed[:]
+    assert run(generator.__anext__()) == 0
+    consumed.append(None)
+    raised_with_message(lambda: run(collect(generator)), 'is_consumed')
+
+
+#------------------------------------------------------------------------------#
+def test_eager_preconditions():
+    def is_positive():
+        return count > 0
+
+    async def is_small():
+        return count < 10
+
+    @contract(pre=(is_positive, is_small))
+    async def produce(count):
+        for item in range(count):
+            yield item
+
+    @contract(pre=is_positive, executor=None)
+    async def offload(count):
+        for item in range(count):
+            yield item
+
+    # The synchronous preconditions are checked when the generator is created,
+    # and the awaited ones, or the ones run in an executor, when it is consumed
+    raised_with_message(lambda: produce(0), 'is_positive')
+    generator = produce(10)
+    raised_with_message(lambda: run(collect(generator)), 'is_small')
+    generator = offload(0)
+    raised_with_message(lambda: run(collect(generator)), 'is_positive')
+    assert run(collect(offload(2))) == [0, 1]
+
+
+#------------------------------------------------------------------------------#
+def test_sample_send():
+    checked = []
+
+    def is_even(item):
+        checked.append(item)
+        return item % 2 == 0
+
+    @contract(each=is_even, sample=2)
+    async def echo():
+        value = 0
+        while True:
+            value = yield value
+
+    async def drive(generator):
+        items = [await generator.__anext__()]
+        for value in (1, 2, 3):
+            items.append(await generator.asend(value))
+        await generator.aclose()
+        return items
+
+    assert run(drive(echo())) == [0, 1, 2, 3]
+    assert checked == [0, 2]
+
+
+#------------------------------------------------------------------------------#
+def test_recursion():
+    levels = []
+
+    def is_counted():
+        levels.append(n)
+        return True
+
+    async def walk(n):
+        yield n
+        if n:
+            async for item in walk(n - 1):
+                yield item
+
+    # The levels are kept while the generators are consumed
+    outermost = contract(pre=is_counted, recursion=0)(walk)
+    every_2nd = contract(pre=is_counted, recursion=2)(walk)
+    walk = outermost
+    assert run(collect(walk(4))) == [4, 3, 2, 1, 0]
+    assert levels == [4]
+    del levels[:]
+    walk = every_2nd
+    assert run(collect(walk(4))) == [4, 3, 2, 1, 0]
+    assert levels == [4, 2, 0]
@@ -18,6 +18,7 @@ You should have received a copy of the GNU Lesser General Public License along
 with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from pytest       import raises
 from pcd          import contract
 from tests.helper import raised_with_message
 
@@ -118,3 +119,343 @@ def test_mutated_postcondition():
             pass
 
     raised_with_message(lambda: mutator(BlackHole()), 'len(mutable) == 1')
+
+
+#------------------------------------------------------------------------------#
+def test_recursion_outermost():
+    levels = []
+
+    @contract(pre=lambda: levels.append(n) is None and n >= 0,
+              recursion=0)
+    def factorial(n):
+        return 1 if n < 2 else n*factorial(n - 1)
+
+    assert factorial(5) == 120
+    assert levels == [5]
+    assert factorial(3) == 6
+    assert levels == [5, 3]
+    raised_with_message(lambda: factorial(-1), 'n >= 0')
+
+
+#------------------------------------------------------------------------------#
+def test_recursion_every_nth():
+    levels = []
+
+    @contract(pre=lambda: levels.append(n) is None,
+              post=lambda r: r == n,
+              recursion=3)
+    def count(n):
+        return 0 if n == 0 else count(n - 1) + 1
+
+    assert count(7) == 7
+    assert levels == [7, 4, 1]
+    assert count(2) == 2
+    assert levels == [7, 4, 1, 2]
+
+
+#------------------------------------------------------------------------------#
+def test_recursion_generator():
+    levels = []
+
+    def is_counted():
+        levels.append(n)
+        return True
+
+    def walk(n):
+        yield n
+        if n:
+            for item in walk(n - 1):
+                yield item
+
+    # The levels are kept while the generators are consumed
+    outermost = contract(pre=is_counted, recursion=0)(walk)
+    every_2nd = contract(pre=is_counted, recursion=2)(walk)
+    walk = outermost
+    assert list(walk(4)) == [4, 3, 2, 1, 0]
+    assert levels == [4]
+    del levels[:]
+    walk = every_2nd
+    assert list(walk(4)) == [4, 3, 2, 1, 0]
+    assert levels == [4, 2, 0]
+
+
+#------------------------------------------------------------------------------#
+def test_generator_items():
+    consumed = []
+
+    @contract(pre=lambda: limit >= 0,
+              each=lambda item: item < limit,
+              mut=lambda: len(consumed) == limit)
+    def numbers(limit, broken=False):
+        for number in range(limit):
+            consumed.append(number)
+            yield limit if broken else number
+
+    stream = numbers(3)
+    assert consumed == []
+    assert next(stream) == 0
+    assert consumed == [0]
+    assert list(stream) == [1, 2]
+    raised_with_message(lambda: numbers(-1), 'limit >= 0')
+    raised_with_message(lambda: list(numbers(2, True)), 'item < limit')
+    del consumed[:]
+    stream = numbers(2)
+    consumed.append(None)
+    raised_with_message(lambda: list(stream), 'len(consumed) == limit')
+
+
+#------------------------------------------------------------------------------#
+def test_generator_sample():
+    checked = []
+
+    @contract(each=lambda item: checked.append(item) is None,
+              sample=3)
+    def numbers(limit):
+        for number in range(limit):
+            yield number
+
+    assert list(numbers(8)) == list(range(8))
+    assert checked == [0, 3, 6]
+
+
+#------------------------------------------------------------------------------#
+def test_generator_send():
+    @contract(each=lambda item: item is None or item > 0)
+    def echo():
+        value = None
+        while True:
+            value = yield value
+
+    stream = echo()
+    assert next(stream) is None
+    assert stream.send(1) == 1
+    raised_with_message(lambda: stream.send(-1), 'item is None or item > 0')
+
+
+#------------------------------------------------------------------------------#
+def test_unchecked():
+    @contract(pre=lambda: divisor != 0)
+    def divide(dividend, divisor):
+        """Divide numbers"""
+        return dividend/divisor
+
+    assert divide.__name__ == 'divide'
+    assert divide.__doc__ == 'Divide numbers'
+    assert divide.unchecked(4, 2) == 2
+    with raises(ZeroDivisionError):
+        divide.unchecked(1, 0)
+    raised_with_message(lambda: divide(1, 0), 'divisor != 0')
+
+
+#------------------------------------------------------------------------------#
+def test_map():
+    called = []
+
+    @contract(pre=lambda: divisor != 0,
+              post=lambda r: r*divisor == dividend,
+              mut=lambda: dividend in called)
+    def divide(dividend, divisor=1):
+        called.append(dividend)
+        return dividend//divisor
+
+    results = divide.map(((i*2, 2) for i in range(10)), chunksize=3)
+    assert called == []
+    assert next(results) == 0
+    assert called == [0, 2, 4]
+    assert list(results) == list(range(1, 10))
+    assert list(divide.map([(7,)])) == [7]
+    raised_with_message(lambda: list(divide.map([(1, 1), (1, 0)])),
+                        'divisor != 0')
+    raised_with_message(lambda: list(divide.map([(1, 1), (3, 2)])),
+                        'r * divisor == dividend')
+
+
+#------------------------------------------------------------------------------#
+def test_map_each():
+    seen = {}
+
+    def is_new():
+        return key not in seen
+
+    def is_added():
+        return len(seen) == size + 1
+
+    @contract(pre=is_new, mut=is_added)
+    def add(key, value, size=None):
+        seen[key] = value
+
+    # Every call is checked as if it was called directly, unless chunks are
+    # asked for
+    assert list(add.map([('a', 0, 0), ('b', 1, 1)])) == [None, None]
+    raised_with_message(lambda: list(add.map([('c', 2, 2), ('c', 3, 3)])),
+                        'is_new')
+    assert sorted(seen) == ['a', 'b', 'c']
+    raised_with_message(lambda: list(add.map([('d', 3, 3), ('e', 4, 4)],
+                                             chunksize=2)),
+                        'is_added')
+
+
+#------------------------------------------------------------------------------#
+def test_map_pool():
+    from multiprocessing.pool import ThreadPool
+
+    @contract(pre=lambda: number >= 0,
+              post=lambda r: r >= number)
+    def square(number):
+        return number*number
+
+    pool = ThreadPool(2)
+    try:
+        assert (list(square.map(((i,) for i in range(10)), 4, pool)) ==
+                [i*i for i in range(10)])
+        raised_with_message(lambda: list(square.map([(-1,)], pool=pool)),
+                            'number >= 0')
+    finally:
+        pool.close()
+
+
+#------------------------------------------------------------------------------#
+def test_parallel():
+    from time      import sleep
+    from threading import current_thread
+
+    threads = []
+    def is_slow_positive():
+        threads.append(current_thread())
+        sleep(0.01)
+        return value > 0
+
+    def is_slow_small():
+        threads.append(current_thread())
+        sleep(0.01)
+        return abs(value) < 10
+
+    @contract(pre=(is_slow_positive,
+                   is_slow_small,
+                   lambda: value != 5),
+              parallel=True)
+    def identity(value):
+        return value
+
+    # First calls measure the conditions
+    assert identity(1) == 1
+    assert threads == [current_thread()]*2
+    del threads[:]
+    assert identity(2) == 2
+    assert len(threads) == 2
+    assert current_thread() not in threads
+    raised_with_message(lambda: identity(5), 'value != 5')
+    raised_with_message(lambda: identity(-5), 'is_slow_positive')
+    raised_with_message(lambda: identity(50), 'is_slow_small')
+    raised_with_message(lambda: identity(-50), 'is_slow_positive')
+
+
+#------------------------------------------------------------------------------#
+def test_parallel_isolated():
+    from time      import sleep
+    from threading import Thread
+
+    def is_slow_stable():
+        before = value
+        sleep(0.01)
+        return value == before
+
+    def is_slow_positive():
+        sleep(0.01)
+        return value > 0
+
+    @contract(pre=(is_slow_stable, is_slow_positive), parallel=True)
+    def identity(value):
+        return value
+
+    # Dispatched conditions are not seeing the arguments of the other calls
+    identity(1)
+    failures = []
+    def call(number):
+        for _ in range(10):
+            try:
+                identity(number)
+            except Exception as exception:
+                failures.append(exception)
+    threads = [Thread(target=call, args=(number,)) for number in (1, 2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures
+
+
+#------------------------------------------------------------------------------#
+def test_parallel_nested(monkeypatch):
+    import pcd._parallel
+    from time   import sleep
+    from signal import alarm
+
+    def is_slow_positive():
+        sleep(0.01)
+        return value > 0
+
+    def is_slow_small():
+        sleep(0.01)
+        return value < 10
+
+    @contract(pre=(is_slow_positive, is_slow_small), parallel=True)
+    def identity(value):
+        return value
+
+    def is_slow_identity():
+        sleep(0.01)
+        return identity(value) == value
+
+    def is_slow_even():
+        sleep(0.01)
+        return not value % 2
+
+    @contract(pre=(is_slow_identity, is_slow_even), parallel=True)
+    def half(value):
+        return value//2
+
+    # Conditions dispatched to a pool of a single thread are checking other
+    # contracts, which are evaluated inline instead of waiting for the pool
+    monkeypatch.setattr(pcd._parallel, 'cpu_count', lambda: 1)
+    monkeypatch.setattr(pcd._parallel, '_pool', None)
+    monkeypatch.setattr(pcd._parallel, '_pool_pid', None)
+    alarm(5)
+    try:
+        for _ in range(3):
+            assert half(4) == 2
+        raised_with_message(lambda: half(3), 'is_slow_even')
+    finally:
+        alarm(0)
+        pcd._parallel._pool.close()
+
+
+#------------------------------------------------------------------------------#
+def test_parallel_fork():
+    from os     import fork, waitpid, _exit
+    from time   import sleep
+    from signal import alarm
+
+    def is_slow_positive():
+        sleep(0.01)
+        return value > 0
+
+    def is_slow_small():
+        sleep(0.01)
+        return value < 10
+
+    @contract(pre=(is_slow_positive, is_slow_small), parallel=True)
+    def identity(value):
+        return value
+
+    # Dispatch the conditions to the pool before forking
+    identity(1)
+    identity(1)
+    pid = fork()
+    if not pid:
+        alarm(5)
+        try:
+            _exit(0 if identity(1) == 1 else 1)
+        finally:
+            _exit(1)
+    assert waitpid(pid, 0)[1] == 0
@@ -0,0 +1,153 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from pcd          import Invariant
+from tests.helper import raised_with_message
+
+# The same tests as the ones of test_invariant.py, but with the syntax of the
+# metaclasses of Python 3, so the analysis of the bytecode of Python 3 is tested
+# as well
+
+
+#------------------------------------------------------------------------------#
+def test_selected_conditions():
+    def is_alpha_positive():
+        self._checked.append('alpha')
+        return self._alpha >= 0
+
+    def is_beta_positive():
+        self._checked.append('beta')
+        return self._beta >= 0
+
+    class Class(metaclass=Invariant):
+
+        __conditions = is_alpha_positive, is_beta_positive
+
+        _alpha = 0
+        _beta  = 0
+
+        def __init__(self):
+            self._checked = []
+
+        def set_alpha(self, value):
+            self._alpha = value
+
+        def add_beta(self, value):
+            self._beta += value
+
+        def get_alpha(self):
+            return self._alpha
+
+        def dynamic(self, name, value):
+            setattr(self, name, value)
+
+        @property
+        def alpha(self):
+            return self._alpha
+
+        @alpha.setter
+        def alpha(self, value):
+            self._alpha = value
+
+    def check(instance, method, *args):
+        del instance._checked[:]
+        method(*args)
+        return sorted(instance._checked)
+
+    c = Class()
+    both = ['alpha', 'alpha', 'beta', 'beta']
+    assert check(c, c.set_alpha, 1) == ['alpha', 'alpha', 'beta']
+    assert check(c, c.add_beta, 1) == both
+    assert check(c, c.get_alpha) == ['alpha', 'beta']
+    assert check(c, lambda: c.alpha) == ['alpha', 'beta']
+    assert check(c, setattr, c, 'alpha', 1) == ['alpha', 'alpha', 'beta']
+    assert check(c, c.dynamic, '_beta', 1) == both
+    raised_with_message(lambda: Class().set_alpha(-1), 'is_alpha_positive')
+    raised_with_message(lambda: Class().add_beta(-1), 'is_beta_positive')
+
+
+#------------------------------------------------------------------------------#
+LIMIT = [10]
+
+def increment(instance):
+    instance._count += 1
+
+def test_selected_conditions_escaping():
+    global LIMIT
+
+    def has_few_items():
+        return len(self._items) < 2
+
+    def is_zero():
+        return self._count == 0
+
+    def is_below_limit():
+        return self._count < LIMIT[0]
+
+    class Class(metaclass=Invariant):
+
+        __conditions = has_few_items, is_zero, is_below_limit
+
+        def __init__(self):
+            self._items = []
+            self._view  = self._items
+            self._count = 0
+
+        def append(self, item):
+            self._items.append(item)
+
+        def append_via_view(self, item):
+            self._view.append(item)
+
+        def calls(self):
+            self.increment()
+
+        def increment(self):
+            self._count += 1
+
+        def escapes(self):
+            increment(self)
+
+        def reset(self, other):
+            other._count = -1
+
+        def lower_limit(self):
+            LIMIT[0] = 0
+
+        def replace_limit(self):
+            global LIMIT
+            LIMIT = [0]
+
+    c = Class()
+    c.append(1)
+    raised_with_message(lambda: c.append(2), 'has_few_items')
+    c = Class()
+    c.append_via_view(1)
+    raised_with_message(lambda: c.append_via_view(2), 'has_few_items')
+    raised_with_message(lambda: Class().calls(), 'is_zero')
+    raised_with_message(lambda: Class().escapes(), 'is_zero')
+    c = Class()
+    raised_with_message(lambda: c.reset(c), 'is_zero')
+    try:
+        raised_with_message(lambda: Class().lower_limit(), 'is_below_limit')
+        LIMIT = [10]
+        raised_with_message(lambda: Class().replace_limit(), 'is_below_limit')
+    finally:
+        LIMIT = [10]
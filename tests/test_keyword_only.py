@@ -0,0 +1,48 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from pcd          import contract
+from tests.helper import raised_with_message
+
+# Keyword-only arguments are declared by the syntax of Python 3 only
+
+
+#------------------------------------------------------------------------------#
+def test_keyword_only_arguments():
+    def is_positive():
+        return step > 0
+
+    def is_bounded(result):
+        return result <= limit
+
+    @contract(pre=is_positive, post=is_bounded)
+    def advance(start, *, step, limit=10):
+        return start + step
+
+    @contract(pre=is_positive, post=is_bounded)
+    def advance_all(*starts, step, limit=10, **options):
+        return max(starts) + step
+
+    assert advance(1, step=2) == 3
+    assert advance(1, limit=20, step=15) == 16
+    assert advance_all(1, 2, step=3, verbose=True) == 5
+    raised_with_message(lambda: advance(1, step=0), 'is_positive')
+    raised_with_message(lambda: advance(1, step=10), 'is_bounded')
+    raised_with_message(lambda: advance_all(1, step=5, limit=5), 'is_bounded')
@@ -0,0 +1,265 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from pytest       import mark, raises
+from pcd          import contract
+from pcd._monitor import monitoring
+from tests.helper import raised_with_message
+
+only_monitored = mark.skipif(monitoring is None,
+                             reason='sys.monitoring is not available')
+
+
+#------------------------------------------------------------------------------#
+def test_fallback():
+    def is_positive():
+        return number > 0
+
+    def is_even(result):
+        return result % 2 == 0
+
+    @contract(pre=is_positive, post=is_even, monitor=True)
+    def double(number):
+        return number*2
+
+    @contract(pre=is_positive, monitor=True)
+    def count(number):
+        for i in range(number):
+            yield i
+
+    assert double(3) == 6
+    assert list(count(3)) == [0, 1, 2]
+    raised_with_message(lambda: double(-1), 'is_positive')
+    raised_with_message(lambda: count(0), 'is_positive')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_identity():
+    def is_positive():
+        return number > 0
+
+    def plain(number):
+        return number
+
+    assert contract(pre=is_positive, monitor=True)(plain) is plain
+    assert plain(1) == 1
+    raised_with_message(lambda: plain(0), 'is_positive')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_conditions():
+    def has_items():
+        return len(items) > 0
+
+    def is_last(result):
+        return result == items[-1]
+
+    def is_removed(result):
+        return result not in items
+
+    def is_shorter():
+        return len(items) < size
+
+    @contract(pre=has_items, post=is_removed, mut=is_shorter, monitor=True)
+    def pop(items, size=None, *args, **kwargs):
+        return items.pop()
+
+    assert pop([1, 2], 3) == 2
+    raised_with_message(lambda: pop([]), 'has_items')
+    raised_with_message(lambda: pop([2, 2], 3), 'is_removed')
+    raised_with_message(lambda: pop([1, 2], 1), 'is_shorter')
+
+    @contract(post=is_last, monitor=True)
+    def first(items):
+        return items[0]
+
+    assert first([1]) == 1
+    raised_with_message(lambda: first([1, 2]), 'is_last')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_shared_code():
+    from gc      import collect
+    from weakref import ref
+
+    def is_positive():
+        return number > 0
+
+    def is_negative():
+        return number < 0
+
+    def create(condition=None):
+        def function(number):
+            return number
+        if condition is not None:
+            assert contract(pre=condition, monitor=True)(function) is function
+        return function
+
+    # Functions created from the same definition are checked by their own
+    # contracts only
+    positive = create(is_positive)
+    negative = create(is_negative)
+    plain    = create()
+    assert positive(1) == 1
+    assert negative(-1) == -1
+    assert plain(0) == 0
+    raised_with_message(lambda: positive(-1), 'is_positive')
+    raised_with_message(lambda: negative(1), 'is_negative')
+    assert positive.unchecked(-1) == -1
+    assert negative.unchecked(1) == 1
+
+    # The contracts are not keeping the functions alive
+    function = ref(create(is_positive))
+    collect()
+    assert function() is None
+    raised_with_message(lambda: create(is_positive)(0), 'is_positive')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_recursion():
+    from sys import getrecursionlimit
+
+    levels = []
+    def is_counted():
+        levels.append(n)
+        return True
+
+    def is_natural(result):
+        return result >= 0
+
+    @contract(pre=is_counted, post=is_natural, recursion=0, monitor=True)
+    def count(n):
+        return 0 if n == 0 else count(n - 1) + 1
+
+    @contract(pre=is_counted, recursion=3, monitor=True)
+    def descend(n, fail=False):
+        if fail and not n:
+            raise ValueError
+        return n and descend(n - 1, fail)
+
+    @contract(pre=is_counted, recursion=0, monitor=True)
+    def visit(n):
+        return n and walk(n)
+
+    def walk(n):
+        return visit(n - 1)
+
+    # The inner levels are not wrapped, so they are not using extra frames,
+    # and a wrapped function could not recurse as deep as this
+    depth = getrecursionlimit()*2//3
+    assert count(depth) == depth
+    assert levels == [depth]
+    del levels[:]
+    assert descend(7) == 0
+    assert levels == [7, 4, 1]
+    del levels[:]
+    assert visit(3) == 0
+    assert levels == [3]
+
+    # The levels of the frames unwound by exceptions are dropped
+    del levels[:]
+    with raises(ValueError):
+        descend(4, True)
+    assert descend(1) == 0
+    assert levels == [4, 1, 1]
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_unchecked_map():
+    def is_positive():
+        return number > 0
+
+    @contract(pre=is_positive, monitor=True)
+    def identity(number):
+        return number
+
+    assert identity.unchecked is not identity
+    assert identity.unchecked(0) == 0
+    assert list(identity.map([(1,), (2,)])) == [1, 2]
+    raised_with_message(lambda: list(identity.map([(1,), (0,)])),
+                        'is_positive')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_passed_arguments():
+    def is_doubled(result):
+        return result == number*2
+
+    def is_none():
+        return value is None
+
+    @contract(post=is_doubled, monitor=True)
+    def double(number):
+        number = number*2
+        return number
+
+    @contract(mut=is_none, monitor=True)
+    def delete(value):
+        del value
+
+    assert double(3) == 6
+    assert delete(None) is None
+    raised_with_message(lambda: delete(1), 'is_none')
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_unwound_frames():
+    def is_same(result):
+        return result == number
+
+    @contract(post=is_same, monitor=True)
+    def identity(number):
+        if number < 0:
+            raise ValueError
+        if number:
+            try:
+                identity(-number)
+            except ValueError:
+                pass
+        return number
+
+    try:
+        identity(-1)
+    except ValueError:
+        pass
+    assert identity(1) == 1
+    assert identity(2) == 2
+
+
+#------------------------------------------------------------------------------#
+@only_monitored
+def test_extended_conditions():
+    def is_positive():
+        return number > 0
+
+    def identity(number):
+        return number
+
+    contract(monitor=True)(identity)
+    assert identity(0) == 0
+    contract(pre=is_positive, monitor=True)(identity)
+    raised_with_message(lambda: identity(0), 'is_positive')
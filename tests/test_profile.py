@@ -0,0 +1,137 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from sys             import argv
+from pytest          import mark
+from pcd             import contract
+from pcd.profile     import Profiler, main
+from pcd._instrument import add, remove
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+SCRIPT = '''
+from sys import argv
+from pcd import contract
+
+@contract(pre=lambda: number > 0)
+def countdown(number):
+    return number if number == 1 else countdown(number - 1)
+
+assert countdown(3) == 1
+assert argv[1:] == ['--argument']
+'''
+
+
+#------------------------------------------------------------------------------#
+def test_nested_calls():
+    @contract(pre=lambda: number > 0)
+    def countdown(number):
+        return number if number == 1 else countdown(number - 1)
+
+    profiler = Profiler()
+    add(profiler)
+    try:
+        countdown(3)
+    finally:
+        remove(profiler)
+
+    name = '{}.{}'.format(__name__, countdown.__qualname__
+                                    if hasattr(countdown, '__qualname__') else
+                                    'countdown')
+    calls, binding, checking, body = profiler.functions[name]
+    assert calls == 3
+    assert binding > 0 and checking > 0
+    assert {len(stack) for stack in profiler.stacks} == {1, 2, 3, 4}
+    assert (name, name, name) in profiler.stacks
+    assert sum(profiler.stacks.values()) <= sum(binding + checking + body
+                                                 for _, binding, checking, body
+                                                 in profiler.functions.values())
+
+    out = StringIO()
+    profiler.report(out)
+    assert name in out.getvalue()
+
+
+#------------------------------------------------------------------------------#
+def test_threads():
+    from time      import sleep
+    from threading import Thread
+
+    # Yield to the other threads while the totals are updated
+    class SlowTotals(list):
+        def __setitem__(self, index, value):
+            sleep(0.0001)
+            list.__setitem__(self, index, value)
+
+    class SlowFunctions(dict):
+        def setdefault(self, key, default):
+            return dict.setdefault(self, key, SlowTotals(default))
+
+    @contract(pre=lambda: number > 0)
+    def identity(number):
+        return number
+
+    def call():
+        for number in range(1, 51):
+            identity(number)
+
+    profiler = Profiler()
+    profiler.functions = SlowFunctions()
+    add(profiler)
+    try:
+        threads = [Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        remove(profiler)
+
+    (calls, _, _, _), = profiler.functions.values()
+    assert calls == 200
+    assert sum(1 for stack in profiler.stacks if len(stack) == 1) == 1
+
+
+#------------------------------------------------------------------------------#
+def test_main(tmpdir):
+    script    = tmpdir.join('script.py')
+    collapsed = tmpdir.join('collapsed')
+    script.write(SCRIPT)
+    arguments = argv[:]
+    try:
+        main(['-o', str(collapsed), str(script), '--argument'])
+    finally:
+        argv[:] = arguments
+
+    stacks = [line.rsplit(' ', 1)[0] for line in collapsed.readlines(cr=False)]
+    assert '__main__.countdown;__main__.countdown;[checking]' in stacks
+
+
+#------------------------------------------------------------------------------#
+@mark.skipif(not hasattr(contract.__code__, 'replace'),
+             reason='code objects cannot be renamed')
+def test_wrapper_name():
+    @contract(pre=lambda: number > 0)
+    def countdown(number):
+        return number
+
+    assert countdown.__code__.co_name == 'countdown'
@@ -0,0 +1,144 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from os           import fork, waitpid, pipe, close, read as read_fd, _exit
+from time         import sleep
+from pcd          import contract, stats
+from pcd.stats    import enable, disable, read, summary
+from tests.helper import raised_with_message
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+#------------------------------------------------------------------------------#
+def is_positive():
+    return number > 0
+
+@contract(pre=is_positive)
+def identity(number):
+    return number
+
+NAME = '{}.identity'.format(__name__)
+
+
+#------------------------------------------------------------------------------#
+def test_counters(tmpdir):
+    path = str(tmpdir.join('stats'))
+    enable(path)
+    try:
+        identity(1)
+        identity(2)
+        raised_with_message(lambda: identity(0), 'is_positive')
+    finally:
+        disable()
+    identity(3)
+
+    checks, failures, seconds, slots = read(path)[NAME]
+    assert (checks, failures, slots) == (3, 1, 1)
+    assert seconds > 0
+
+    # Counters of the same process are kept when enabled again
+    enable(path)
+    try:
+        identity(4)
+    finally:
+        disable()
+    assert read(path)[NAME][:2] == (4, 1)
+
+    out = StringIO()
+    summary(path, out)
+    assert NAME in out.getvalue()
+
+
+#------------------------------------------------------------------------------#
+def test_workers(tmpdir):
+    path = str(tmpdir.join('stats'))
+    enable(path)
+    try:
+        identity(1)
+        pid = fork()
+        if not pid:
+            try:
+                identity(1)
+                identity(1)
+            finally:
+                _exit(0)
+        waitpid(pid, 0)
+    finally:
+        disable()
+
+    assert read(path)[NAME][:2] + read(path)[NAME][3:] == (3, 0, 2)
+
+
+#------------------------------------------------------------------------------#
+def test_concurrent_workers(tmpdir, monkeypatch):
+    slot = stats._SLOT
+
+    # Slow down claiming a free slot, which is done while the file is locked
+    class SlowSlot(object):
+        size = slot.size
+        def unpack_from(self, *args):
+            values = slot.unpack_from(*args)
+            sleep(0.001)
+            return values
+        def pack_into(self, *args):
+            slot.pack_into(*args)
+    monkeypatch.setattr(stats, '_SLOT', SlowSlot())
+
+    path = str(tmpdir.join('stats'))
+    enable(path)
+    try:
+        # Workers are claiming their slots at the same time, and they are kept
+        # alive until all of them have claimed one, so no slots can be adopted
+        reader, writer = pipe()
+        pids = []
+        for _ in range(8):
+            pid = fork()
+            if not pid:
+                try:
+                    for _ in range(100):
+                        identity(1)
+                    # Wait until all the workers have claimed their slots
+                    close(writer)
+                    read_fd(reader, 1)
+                finally:
+                    _exit(0)
+            pids.append(pid)
+        close(writer)
+        for pid in pids:
+            waitpid(pid, 0)
+        close(reader)
+    finally:
+        disable()
+
+    assert read(path)[NAME][:2] + read(path)[NAME][3:] == (800, 0, 8)
+
+
+#------------------------------------------------------------------------------#
+def test_full(tmpdir):
+    path = str(tmpdir.join('stats'))
+    enable(path, slots=1, entries=0)
+    try:
+        assert identity(1) == 1
+    finally:
+        disable()
+    assert read(path) == {}
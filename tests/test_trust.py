@@ -0,0 +1,66 @@
+## INFO ##
+## INFO ##
+"""
+pcd - Python Contract Decorator
+-------------------------------
+Copyright (C) 2017 Peter Varo <hello@petervaro.com>
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU Lesser General Public License as published by the Free
+Software Foundation, either version 3 of the License, or (at your option) any
+later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along
+with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from pcd          import contract, trust, distrust
+from tests.helper import raised_with_message
+
+
+#------------------------------------------------------------------------------#
+def test_trusted_module():
+    @contract(pre=lambda: value > 0,
+              post=lambda r: r != 0)
+    def increment(value):
+        return value + 1
+
+    trust(__name__)
+    try:
+        assert increment(-5) == -4
+        raised_with_message(lambda: increment(-1), 'r != 0')
+    finally:
+        distrust(__name__)
+    raised_with_message(lambda: increment(-5), 'value > 0')
+
+
+#------------------------------------------------------------------------------#
+def test_trusted_package():
+    @contract(pre=lambda: value > 0,
+              post=lambda r: r != 0)
+    def increment(value):
+        return value + 1
+
+    trust(('tests', 'pcd'), skip_post=True)
+    try:
+        assert increment(-1) == 0
+    finally:
+        distrust(('tests', 'pcd'))
+    raised_with_message(lambda: increment(-1), 'value > 0')
+
+
+#------------------------------------------------------------------------------#
+def test_untrusted_module():
+    @contract(pre=lambda: value > 0, recursion=0)
+    def identity(value):
+        return value
+
+    trust('test')
+    try:
+        raised_with_message(lambda: identity(-1), 'value > 0')
+    finally:
+        distrust('test')